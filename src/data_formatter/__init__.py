@@ -6,50 +6,8 @@ A scalable Python module for converting between different data formats
 using an intermediate representation approach inspired by compiler design.
 """
 
+import importlib
 import sys
-from pathlib import Path
-
-# Import all components to trigger registry registration
-from data_formatter.ir import IntermediateRepresentation, DataSample
-from data_formatter.registry import (
-    parser_registry,
-    writer_registry,
-    styling_registry,
-    transformer_registry
-)
-
-# Import parsers (triggers registration)
-from data_formatter.parsers import (
-    JSONLParser,
-    JSONParser,
-    CSVParser,
-    YAMLParser
-)
-
-# Import writers (triggers registration)
-from data_formatter.writers import (
-    JSONLWriter,
-    JSONWriter,
-    CSVWriter,
-    YAMLWriter
-)
-
-# Import stylings (triggers registration)
-from data_formatter.stylings import (
-    TextLabelStyling,
-    OpenAIChatStyling,
-    AlpacaStyling,
-    ShareGPTStyling,
-    ChatMLStyling
-)
-
-# Import transformers (triggers registration)
-from data_formatter.transformers import ContextPromptTransformer
-
-# Import main API
-from data_formatter.converter import DataFormatter
-from data_formatter.utils.config import load_data_config
-
 
 __version__ = "0.1.0"
 
@@ -60,38 +18,91 @@ __all__ = [
     "DataSample",
 ]
 
+# Public attribute -> defining module. Submodules are imported on first
+# attribute access (PEP 562) so `import data_formatter` doesn't pay for
+# pandas/yaml when only one format is needed. Importing a component module
+# still triggers its registry registration as before.
+_LAZY = {
+    # Core IR
+    "IntermediateRepresentation": "data_formatter.ir",
+    "DataSample": "data_formatter.ir",
+    "ColumnarIR": "data_formatter.ir",
+    # Registries
+    "parser_registry": "data_formatter.registry",
+    "writer_registry": "data_formatter.registry",
+    "styling_registry": "data_formatter.registry",
+    "transformer_registry": "data_formatter.registry",
+    # Parsers
+    "JSONLParser": "data_formatter.parsers",
+    "JSONParser": "data_formatter.parsers",
+    "CSVParser": "data_formatter.parsers",
+    "YAMLParser": "data_formatter.parsers",
+    # Writers
+    "JSONLWriter": "data_formatter.writers",
+    "JSONWriter": "data_formatter.writers",
+    "CSVWriter": "data_formatter.writers",
+    "YAMLWriter": "data_formatter.writers",
+    # Stylings
+    "TextLabelStyling": "data_formatter.stylings",
+    "OpenAIChatStyling": "data_formatter.stylings",
+    "AlpacaStyling": "data_formatter.stylings",
+    "ShareGPTStyling": "data_formatter.stylings",
+    "ChatMLStyling": "data_formatter.stylings",
+    # Transformers
+    "ContextPromptTransformer": "data_formatter.transformers",
+    # Main API
+    "DataFormatter": "data_formatter.converter",
+    "load_data_config": "data_formatter.utils.config",
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    obj = getattr(importlib.import_module(module_name), name)
+    globals()[name] = obj  # Cache so __getattr__ runs once per name
+    return obj
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
+
 
 def main():
     """
     CLI entry point (optional convenience wrapper).
-    
+
     Primary usage is via Python API, but this provides basic CLI support.
     """
+    from data_formatter.converter import DataFormatter
+    from data_formatter.utils.config import load_data_config
+
     if len(sys.argv) < 3:
         print("Usage: data-formatter <data_config.json> <target_styling> [target_format]")
         print("\nExample:")
         print("  data-formatter data_config.json openai_chat jsonl")
         sys.exit(1)
-    
+
     config_path = sys.argv[1]
     target_styling = sys.argv[2]
     target_format = sys.argv[3] if len(sys.argv) > 3 else "jsonl"
-    
+
     try:
         # Load data config
         data_config = load_data_config(config_path)
-        
+
         # Create formatter and convert
         formatter = DataFormatter(data_config)
         output_paths = formatter.convert(
             target_styling=target_styling,
             target_format=target_format
         )
-        
+
         print(f"✓ Converted {len(output_paths)} file(s)")
         for path in output_paths:
             print(f"  → {path}")
-    
+
     except Exception as e:
         print(f"✗ Error: {e}", file=sys.stderr)
         sys.exit(1)
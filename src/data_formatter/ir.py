@@ -1,87 +1,189 @@
-"""
-Intermediate Representation (IR) for data-formatter.
-
-This module defines the core data structures used as an intermediate
-representation between different data formats and stylings.
-"""
-
-from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Literal
-
-
-# Supported formats
-FormatType = Literal["csv", "json", "jsonl", "yaml"]
-
-# Supported stylings
-StylingType = Literal[
-    "text_label",
-    "openai_chat",
-    "sharegpt",
-    "chatml",
-    "alpaca",
-    "special_tokens",
-    "custom",
-]
-
-
-@dataclass
-class DataSample:
-    """
-    A single data sample in the intermediate representation.
-    
-    This flexible structure can represent various data stylings:
-    - text/label: {"text": "...", "label": "..."}
-    - chat formats: {"messages": [...]}
-    - custom: any dict structure
-    
-    Attributes:
-        data: The actual data content (flexible dict structure)
-        metadata: Optional metadata about this sample (source, id, etc.)
-    """
-    data: Dict[str, Any]
-    metadata: Optional[Dict[str, Any]] = None
-
-    def __post_init__(self):
-        if not isinstance(self.data, dict):
-            raise ValueError("DataSample.data must be a dictionary")
-
-
-@dataclass
-class IntermediateRepresentation:
-    """
-    Container for all data samples with metadata.
-    
-    This represents the complete dataset in a format-agnostic way,
-    allowing for lossless conversion between formats.
-    
-    Attributes:
-        samples: List of all data samples
-        source_format: Original format of the data
-        source_styling: Original styling of the data
-        metadata: Optional global metadata (dataset name, description, etc.)
-    """
-    samples: List[DataSample] = field(default_factory=list)
-    source_format: Optional[FormatType] = None
-    source_styling: Optional[StylingType] = None
-    metadata: Optional[Dict[str, Any]] = None
-
-    def __post_init__(self):
-        # Ensure samples is a list of DataSample objects
-        if not all(isinstance(s, DataSample) for s in self.samples):
-            raise ValueError("All samples must be DataSample instances")
-
-    def add_sample(self, data: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None):
-        """Add a new sample to the IR."""
-        self.samples.append(DataSample(data=data, metadata=metadata))
-
-    def __len__(self) -> int:
-        """Return number of samples."""
-        return len(self.samples)
-
-    def __iter__(self):
-        """Iterate over samples."""
-        return iter(self.samples)
-
-    def __getitem__(self, index: int) -> DataSample:
-        """Get sample by index."""
-        return self.samples[index]
+"""
+Intermediate Representation (IR) for data-formatter.
+
+This module defines the core data structures used as an intermediate
+representation between different data formats and stylings.
+"""
+
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Literal
+
+# slots=True cuts the per-instance __dict__ (significant when an IR holds
+# millions of DataSample rows); the keyword needs Python 3.10+.
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+# Supported formats
+FormatType = Literal["csv", "json", "jsonl", "yaml"]
+
+# Supported stylings
+StylingType = Literal[
+    "text_label",
+    "openai_chat",
+    "sharegpt",
+    "chatml",
+    "alpaca",
+    "special_tokens",
+    "custom",
+]
+
+
+@dataclass(**_SLOTS)
+class DataSample:
+    """
+    A single data sample in the intermediate representation.
+    
+    This flexible structure can represent various data stylings:
+    - text/label: {"text": "...", "label": "..."}
+    - chat formats: {"messages": [...]}
+    - custom: any dict structure
+    
+    Attributes:
+        data: The actual data content (flexible dict structure)
+        metadata: Optional metadata about this sample (source, id, etc.)
+    """
+    data: Dict[str, Any]
+    metadata: Optional[Dict[str, Any]] = None
+
+    def __post_init__(self):
+        # Validation only; stripped under python -O
+        if __debug__:
+            if not isinstance(self.data, dict):
+                raise ValueError("DataSample.data must be a dictionary")
+
+
+@dataclass(**_SLOTS)
+class IntermediateRepresentation:
+    """
+    Container for all data samples with metadata.
+    
+    This represents the complete dataset in a format-agnostic way,
+    allowing for lossless conversion between formats.
+    
+    Attributes:
+        samples: List of all data samples
+        source_format: Original format of the data
+        source_styling: Original styling of the data
+        metadata: Optional global metadata (dataset name, description, etc.)
+    """
+    samples: List[DataSample] = field(default_factory=list)
+    source_format: Optional[FormatType] = None
+    source_styling: Optional[StylingType] = None
+    metadata: Optional[Dict[str, Any]] = None
+
+    def __post_init__(self):
+        # Ensure samples is a list of DataSample objects.
+        # O(N) validation only; stripped under python -O
+        if __debug__:
+            if not all(isinstance(s, DataSample) for s in self.samples):
+                raise ValueError("All samples must be DataSample instances")
+
+    def add_sample(self, data: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None):
+        """Add a new sample to the IR."""
+        self.samples.append(DataSample(data=data, metadata=metadata))
+
+    def _append_fast(self, data: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None):
+        """
+        Append a sample without constructor validation.
+
+        For trusted internal callers (parsers, converters) appending data
+        that is already known to be a dict; bypasses DataSample.__init__.
+        """
+        sample = DataSample.__new__(DataSample)
+        sample.data = data
+        sample.metadata = metadata
+        self.samples.append(sample)
+
+    def __len__(self) -> int:
+        """Return number of samples."""
+        return len(self.samples)
+
+    def __iter__(self):
+        """Iterate over samples."""
+        return iter(self.samples)
+
+    def __getitem__(self, index: int) -> DataSample:
+        """Get sample by index."""
+        return self.samples[index]
+
+    def to_columnar(self) -> Optional["ColumnarIR"]:
+        """
+        Return a columnar (structure-of-arrays) view, or None.
+
+        Only possible when every sample shares the same key set; see
+        ColumnarIR.from_ir.
+        """
+        return ColumnarIR.from_ir(self)
+
+
+@dataclass(**_SLOTS)
+class ColumnarIR:
+    """
+    Structure-of-arrays companion to IntermediateRepresentation.
+
+    For bulk workflows where every sample has the same schema (the usual
+    case: a large homogeneous JSONL/CSV dataset), holding one list per
+    column avoids the per-row DataSample + dict pair, which is both an
+    allocation and a pointer-chase per sample. Opt-in: convert with
+    IntermediateRepresentation.to_columnar() and back with to_ir().
+
+    Attributes:
+        columns: Mapping of column name to list of values (all same length)
+        n_rows: Number of rows
+        source_format: Original format of the data
+        source_styling: Original styling of the data
+    """
+    columns: Dict[str, List[Any]]
+    n_rows: int
+    source_format: Optional[FormatType] = None
+    source_styling: Optional[StylingType] = None
+
+    @classmethod
+    def from_ir(cls, ir: IntermediateRepresentation) -> Optional["ColumnarIR"]:
+        """
+        Build a columnar view of an IR, or return None if the samples do
+        not share a uniform schema (heterogeneous data stays row-oriented).
+        """
+        samples = ir.samples
+        if not samples:
+            return cls(columns={}, n_rows=0,
+                       source_format=ir.source_format,
+                       source_styling=ir.source_styling)
+
+        keys = samples[0].data.keys()
+        # Cheap prefix check before committing to the full column build
+        if any(sample.data.keys() != keys for sample in samples[:32]):
+            return None
+        # The KeyError below only catches missing keys; a superset schema
+        # past the prefix would be silently truncated. Same length plus no
+        # KeyError implies an identical key set, so this O(N) scan makes
+        # the build exact
+        n_keys = len(keys)
+        if any(len(sample.data) != n_keys for sample in samples):
+            return None
+        try:
+            columns = {key: [sample.data[key] for sample in samples] for key in keys}
+        except KeyError:
+            # Schema diverged past the sampled prefix
+            return None
+        return cls(columns=columns, n_rows=len(samples),
+                   source_format=ir.source_format,
+                   source_styling=ir.source_styling)
+
+    def to_ir(self) -> IntermediateRepresentation:
+        """Materialize back into a row-oriented IntermediateRepresentation."""
+        ir = IntermediateRepresentation(
+            source_format=self.source_format,
+            source_styling=self.source_styling,
+        )
+        keys = tuple(self.columns)
+        ir.samples = [
+            DataSample(data=dict(zip(keys, row)))
+            for row in zip(*(self.columns[key] for key in keys))
+        ]
+        return ir
+
+    def __len__(self) -> int:
+        """Return number of rows."""
+        return self.n_rows
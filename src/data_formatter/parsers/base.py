@@ -2,7 +2,27 @@
 
 from abc import ABC, abstractmethod
 from pathlib import Path
-from data_formatter.ir import IntermediateRepresentation
+from typing import Any, List
+from data_formatter.ir import IntermediateRepresentation, DataSample
+
+
+def _samples_from_list(items: List[Any]) -> List[DataSample]:
+    """
+    Build DataSamples from a list of parsed items.
+
+    The common case is a homogeneous array of dicts; one C-level type scan
+    over the list picks a branch-free comprehension when it holds, instead
+    of an isinstance-and-wrap branch per element. Mixed lists take the
+    general path that wraps non-dict values as {"value": item}. The scan
+    must be exhaustive: DataSample's own dict check is debug-only and
+    stripped under python -O, so it cannot be the safety net here.
+    """
+    if items and all(type(item) is dict for item in items):
+        return [DataSample(data=item) for item in items]
+    return [
+        DataSample(data=item if isinstance(item, dict) else {"value": item})
+        for item in items
+    ]
 
 
 class BaseParser(ABC):
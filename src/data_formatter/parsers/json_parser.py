@@ -3,7 +3,7 @@
 import json
 from pathlib import Path
 from data_formatter.ir import IntermediateRepresentation, DataSample
-from data_formatter.parsers.base import BaseParser
+from data_formatter.parsers.base import BaseParser, _samples_from_list
 from data_formatter.registry import parser_registry
 
 
@@ -26,20 +26,12 @@ class JSONParser(BaseParser):
         
         if isinstance(data, list):
             # Array of samples
-            for item in data:
-                if isinstance(item, dict):
-                    ir.add_sample(item)
-                else:
-                    ir.add_sample({"value": item})
+            ir.samples = _samples_from_list(data)
         elif isinstance(data, dict):
             # Could be a single sample or a container with data array
             if "data" in data and isinstance(data["data"], list):
                 # Container format: {"data": [...]}
-                for item in data["data"]:
-                    if isinstance(item, dict):
-                        ir.add_sample(item)
-                    else:
-                        ir.add_sample({"value": item})
+                ir.samples = _samples_from_list(data["data"])
             else:
                 # Single sample
                 ir.add_sample(data)
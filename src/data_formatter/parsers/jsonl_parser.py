@@ -1,37 +1,66 @@
-"""JSONL (JSON Lines) format parser."""
-
-import json
-from pathlib import Path
-from data_formatter.ir import IntermediateRepresentation, DataSample
-from data_formatter.parsers.base import BaseParser
-from data_formatter.registry import parser_registry
-
-
-@parser_registry.register("jsonl")
-class JSONLParser(BaseParser):
-    """Parser for JSONL (newline-delimited JSON) files."""
-
-    def parse(self, file_path: Path) -> IntermediateRepresentation:
-        """
-        Parse a JSONL file line by line.
-        
-        Each line should be a valid JSON object.
-        Memory-efficient for large files.
-        """
-        ir = IntermediateRepresentation(source_format="jsonl")
-        
-        with open(file_path, 'r', encoding='utf-8') as f:
-            for line_num, line in enumerate(f, 1):
-                line = line.strip()
-                if not line:  # Skip empty lines
-                    continue
-                    
-                try:
-                    data = json.loads(line)
-                    if not isinstance(data, dict):
-                        data = {"value": data}  # Wrap non-dict values
-                    ir.add_sample(data)
-                except json.JSONDecodeError as e:
-                    raise ValueError(f"Invalid JSON on line {line_num} in {file_path}: {e}")
-        
-        return ir
+"""JSONL (JSON Lines) format parser."""
+
+import json
+import mmap
+from pathlib import Path
+from data_formatter.ir import IntermediateRepresentation, DataSample
+from data_formatter.parsers.base import BaseParser
+from data_formatter.registry import parser_registry
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Files above this size are read through mmap: line iteration then touches
+# page-cache pages directly instead of copying through a userspace buffer.
+# Below it, plain buffered reads win (no mapping setup cost).
+_MMAP_THRESHOLD = 16 << 20  # 16 MiB
+
+
+@parser_registry.register("jsonl")
+class JSONLParser(BaseParser):
+    """Parser for JSONL (newline-delimited JSON) files."""
+
+    def parse(self, file_path: Path) -> IntermediateRepresentation:
+        """
+        Parse a JSONL file line by line.
+
+        Each line should be a valid JSON object.
+        Memory-efficient for large files.
+
+        Uses orjson when available: it parses raw bytes directly (no decode
+        needed, trailing whitespace tolerated) and is several times faster
+        than the stdlib parser.
+        """
+        ir = IntermediateRepresentation(source_format="jsonl")
+        loads = orjson.loads if orjson is not None else json.loads
+
+        samples = []
+        # 1 MiB buffer amortizes read syscalls on multi-GB files; above the
+        # threshold, mmap the file so lines come straight off the page cache
+        with open(file_path, 'rb', buffering=1 << 20) as f:
+            if file_path.stat().st_size > _MMAP_THRESHOLD:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    self._parse_lines(iter(mm.readline, b''), samples, loads, file_path)
+            else:
+                self._parse_lines(f, samples, loads, file_path)
+
+        # Bulk-assign instead of one add_sample call per line
+        ir.samples = samples
+        return ir
+
+    @staticmethod
+    def _parse_lines(lines, samples, loads, file_path):
+        """Decode an iterable of JSONL byte lines into samples."""
+        for line_num, line in enumerate(lines, 1):
+            if not line.strip():  # Skip empty lines
+                continue
+
+            try:
+                data = loads(line)
+            except ValueError as e:
+                raise ValueError(f"Invalid JSON on line {line_num} in {file_path}: {e}")
+            if not isinstance(data, dict):
+                data = {"value": data}  # Wrap non-dict values
+            samples.append(DataSample(data=data))
@@ -2,10 +2,16 @@
 
 import yaml
 from pathlib import Path
-from data_formatter.ir import IntermediateRepresentation
-from data_formatter.parsers.base import BaseParser
+from data_formatter.ir import IntermediateRepresentation, DataSample
+from data_formatter.parsers.base import BaseParser, _samples_from_list
 from data_formatter.registry import parser_registry
 
+try:
+    # libyaml-backed C loader; same semantics as SafeLoader, much faster
+    from yaml import CSafeLoader as _YAMLLoader
+except ImportError:
+    from yaml import SafeLoader as _YAMLLoader
+
 
 @parser_registry.register("yaml")
 class YAMLParser(BaseParser):
@@ -20,34 +26,31 @@ class YAMLParser(BaseParser):
         - Single document (object or array)
         """
         ir = IntermediateRepresentation(source_format="yaml")
-        
+
         with open(file_path, 'r', encoding='utf-8') as f:
-            # Use safe_load_all to handle multi-document YAML
-            documents = list(yaml.safe_load_all(f))
-        
+            # load_all handles multi-document YAML; the loader is the C
+            # implementation when libyaml is available
+            documents = list(yaml.load_all(f, Loader=_YAMLLoader))
+
+        # Accumulate in a local list and bulk-assign once; avoids the
+        # ir.samples attribute lookup per document
+        samples = []
         for doc in documents:
             if doc is None:
                 continue
-                
+
             if isinstance(doc, list):
                 # Array of samples
-                for item in doc:
-                    if isinstance(item, dict):
-                        ir.add_sample(item)
-                    else:
-                        ir.add_sample({"value": item})
+                samples.extend(_samples_from_list(doc))
             elif isinstance(doc, dict):
                 # Single sample or container
                 if "data" in doc and isinstance(doc["data"], list):
-                    for item in doc["data"]:
-                        if isinstance(item, dict):
-                            ir.add_sample(item)
-                        else:
-                            ir.add_sample({"value": item})
+                    samples.extend(_samples_from_list(doc["data"]))
                 else:
-                    ir.add_sample(doc)
+                    samples.append(DataSample(data=doc))
             else:
                 # Primitive value
-                ir.add_sample({"value": doc})
-        
+                samples.append(DataSample(data={"value": doc}))
+
+        ir.samples = samples
         return ir
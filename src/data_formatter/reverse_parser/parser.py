@@ -1,440 +1,644 @@
-"""Multi-stage reverse parser implementation.
-
-This module implements a PyYAML-inspired pipeline architecture:
-    Scanner → MessageParser → MessageComposer → Canonical Messages
-
-The separation of concerns enables:
-- Testability: Each stage can be unit tested independently
-- Extensibility: Swap components without changing core logic
-- Debuggability: Inspect intermediate tokens/blocks
-"""
-
-from typing import List, Dict
-from dataclasses import dataclass
-
-from .template_spec import ChatTemplateSpec
-from .exceptions import (
-    UnknownDelimiterError,
-    NestedBlockError,
-    UnclosedBlockError,
-    EmptyContentError,
-    MalformedTemplateError,
-)
-
-
-@dataclass
-class Token:
-    """
-    Represents a delimiter token found in rendered text.
-    
-    Attributes:
-        type: 'start' or 'end'
-        role: Role this delimiter represents
-        position: Character position in source text
-        delimiter: The actual delimiter string
-    """
-    type: str  # 'start' or 'end'
-    role: str
-    position: int
-    delimiter: str
-
-
-class Scanner:
-    """
-    Tokenizes rendered text by identifying delimiter boundaries.
-    
-    First stage in the parsing pipeline. Scans the input text and produces
-    a stream of tokens representing delimiter positions.
-    """
-    
-    def __init__(self, template_spec: ChatTemplateSpec):
-        """
-        Initialize scanner with template specification.
-        
-        Args:
-            template_spec: Template defining delimiters to scan for
-        """
-        self.template_spec = template_spec
-        
-    def scan(self, text: str) -> List[Token]:
-        """
-        Scan text and produce delimiter tokens.
-        
-        Args:
-            text: Rendered chat template text to scan
-            
-        Returns:
-            Ordered list of Token objects sorted by position
-        """
-        tokens = []
-        
-        # First, detect if we have shared end delimiters
-        # (same end delimiter used by multiple roles)
-        end_delimiter_to_roles = {}
-        for delimiter_spec in self.template_spec.delimiters:
-            if delimiter_spec.end_delimiter:
-                if delimiter_spec.end_delimiter not in end_delimiter_to_roles:
-                    end_delimiter_to_roles[delimiter_spec.end_delimiter] = []
-                end_delimiter_to_roles[delimiter_spec.end_delimiter].append(delimiter_spec.role)
-        
-        # Track which end delimiters are shared (used by multiple roles)
-        shared_end_delimiters = {
-            delim: roles for delim, roles in end_delimiter_to_roles.items()
-            if len(roles) > 1
-        }
-        
-        for delimiter_spec in self.template_spec.delimiters:
-            # Find all occurrences of start delimiter
-            start_positions = self._find_all(text, delimiter_spec.start_delimiter)
-            for pos in start_positions:
-                tokens.append(Token(
-                    type='start',
-                    role=delimiter_spec.role,
-                    position=pos,
-                    delimiter=delimiter_spec.start_delimiter
-                ))
-            
-            # Find all occurrences of end delimiter (if present)
-            if delimiter_spec.end_delimiter:
-                # Only add end tokens once if it's shared across roles
-                if delimiter_spec.end_delimiter in shared_end_delimiters:
-                    # Skip this - we'll add it separately
-                    continue
-                    
-                end_positions = self._find_all(text, delimiter_spec.end_delimiter)
-                for pos in end_positions:
-                    tokens.append(Token(
-                        type='end',
-                        role=delimiter_spec.role,
-                        position=pos,
-                        delimiter=delimiter_spec.end_delimiter
-                    ))
-        
-        # Add shared end delimiters (not role-specific)
-        for shared_delim in shared_end_delimiters:
-            end_positions = self._find_all(text, shared_delim)
-            for pos in end_positions:
-                # Use empty string for role to indicate it's shared
-                tokens.append(Token(
-                    type='end',
-                    role='',  # No specific role - will match any open block
-                    position=pos,
-                    delimiter=shared_delim
-                ))
-        
-        # Sort by position to maintain document order
-        tokens.sort(key=lambda t: t.position)
-        return tokens
-    
-    def _find_all(self, text: str, pattern: str) -> List[int]:
-        """
-        Find all positions of pattern in text.
-        
-        Args:
-            text: Text to search in
-            pattern: Pattern to search for
-            
-        Returns:
-            List of starting positions where pattern was found
-        """
-        positions = []
-        start = 0
-        while True:
-            pos = text.find(pattern, start)
-            if pos == -1:
-                break
-            positions.append(pos)
-            start = pos + 1  # Continue searching after this occurrence
-        return positions
-
-
-@dataclass
-class MessageBlock:
-    """
-    Intermediate representation of a message block.
-    
-    Represents a parsed message block with its content boundaries.
-    
-    Attributes:
-        role: Message role (user, assistant, system, etc.)
-        content_start: Start position of message content
-        content_end: End position of message content
-        start_token: Token that started this block
-        end_token: Token that ended this block (None for prefix-only)
-    """
-    role: str
-    content_start: int
-    content_end: int
-    start_token: Token
-    end_token: Token = None
-
-
-class MessageParser:
-    """
-    Parses token stream into message blocks.
-    
-    Second stage in the parsing pipeline. Takes tokens from Scanner
-    and validates structure while extracting message boundaries.
-    """
-    
-    def __init__(self, template_spec: ChatTemplateSpec):
-        """
-        Initialize parser with template specification.
-        
-        Args:
-            template_spec: Template defining parsing rules
-        """
-        self.template_spec = template_spec
-        
-    def parse(self, text: str, tokens: List[Token]) -> List[MessageBlock]:
-        """
-        Parse tokens into message blocks.
-        
-        Validates:
-        - Properly paired delimiters
-        - No overlapping blocks (unless nesting allowed)
-        - No unexpected nesting
-        
-        Args:
-            text: Original source text (for position validation)
-            tokens: Token stream from Scanner
-            
-        Returns:
-            List of MessageBlock objects
-            
-        Raises:
-            NestedBlockError: If nested blocks detected when not allowed
-            UnclosedBlockError: If block started but not closed
-            MalformedTemplateError: If delimiter pairing is invalid
-        """
-        blocks = []
-        stack = []  # Stack to track open blocks
-        
-        for token in tokens:
-            if token.type == 'start':
-                # Check for invalid nesting
-                if stack and not self.template_spec.allow_nesting:
-                    raise NestedBlockError(
-                        f"Nested message blocks detected at position {token.position}. "
-                        f"Open block for role '{stack[-1].role}' at position {stack[-1].position}, "
-                        f"new block for role '{token.role}' at position {token.position}"
-                    )
-                stack.append(token)
-                
-            elif token.type == 'end':
-                if not stack:
-                    raise UnclosedBlockError(
-                        f"Unmatched end delimiter '{token.delimiter}' at position {token.position}. "
-                        f"No corresponding start delimiter found."
-                    )
-                
-                start_token = stack.pop()
-                
-                # For shared end delimiters (like <|im_end|>), role doesn't matter
-                # Just verify the delimiter strings match the template spec
-                delimiter_spec = self.template_spec.get_delimiter_for_role(start_token.role)
-                if delimiter_spec and delimiter_spec.end_delimiter:
-                    # If end delimiter is specified for this role, check it matches
-                    if token.delimiter != delimiter_spec.end_delimiter:
-                        # This end token doesn't match the expected end for this role
-                        # Put start token back on stack and skip this end token
-                        stack.append(start_token)
-                        continue
-                
-                # Calculate content positions
-                content_start = start_token.position + len(start_token.delimiter)
-                content_end = token.position
-                
-                blocks.append(MessageBlock(
-                    role=start_token.role,
-                    content_start=content_start,
-                    content_end=content_end,
-                    start_token=start_token,
-                    end_token=token
-                ))
-        
-        # Check for unclosed blocks
-        if stack:
-            unclosed = stack[-1]
-            raise UnclosedBlockError(
-                f"Unclosed message block for role '{unclosed.role}' "
-                f"starting at position {unclosed.position}. "
-                f"Expected closing delimiter '{self.template_spec.get_delimiter_for_role(unclosed.role).end_delimiter}'"
-            )
-        
-        return blocks
-
-
-class MessageComposer:
-    """
-    Composes canonical messages from message blocks.
-    
-    Third stage in the parsing pipeline. Takes validated message blocks
-    and produces the final canonical message format.
-    """
-    
-    def __init__(self, template_spec: ChatTemplateSpec, 
-                 allow_empty_content: bool = False):
-        """
-        Initialize composer with template specification.
-        
-        Args:
-            template_spec: Template defining composition rules
-            allow_empty_content: Whether to allow messages with empty content
-        """
-        self.template_spec = template_spec
-        self.allow_empty_content = allow_empty_content
-        
-    def compose(self, text: str, blocks: List[MessageBlock]) -> List[Dict[str, str]]:
-        """
-        Compose canonical message list from blocks.
-        
-        Args:
-            text: Original source text
-            blocks: Validated message blocks from MessageParser
-            
-        Returns:
-            List of {"role": str, "content": str} dicts in canonical format
-            
-        Raises:
-            EmptyContentError: If empty content found and not allowed
-        """
-        messages = []
-        
-        for block in blocks:
-            # Extract content using block boundaries
-            content = text[block.content_start:block.content_end]
-            
-            # Normalize whitespace if configured
-            if self.template_spec.normalize_whitespace:
-                content = self._normalize_whitespace(content)
-            
-            # Check empty content policy
-            if not content.strip() and not self.allow_empty_content:
-                raise EmptyContentError(
-                    f"Empty content for role '{block.role}' at position {block.start_token.position}. "
-                    f"Set allow_empty_content=True to permit empty messages."
-                )
-            
-            messages.append({
-                "role": block.role,
-                "content": content
-            })
-        
-        return messages
-    
-    def _normalize_whitespace(self, text: str) -> str:
-        """
-        Normalize whitespace while preserving content structure.
-        
-        - Strips leading/trailing whitespace
-        - Preserves newlines for multi-line content
-        - Removes empty lines
-        
-        Args:
-            text: Text to normalize
-            
-        Returns:
-            Normalized text
-        """
-        # Strip leading/trailing whitespace
-        text = text.strip()
-        
-        # Normalize internal whitespace (preserve newlines for structure)
-        lines = [line.strip() for line in text.split('\n')]
-        
-        # Remove empty lines while preserving content structure
-        return '\n'.join(line for line in lines if line)
-
-
-class ReverseParser:
-    """
-    High-level reverse parser orchestrating the multi-stage pipeline.
-    
-    Pipeline: Scanner → MessageParser → MessageComposer → Canonical Messages
-    
-    This class provides the main API for reverse parsing rendered chat
-    template text back into canonical message structures.
-    
-    Example:
-        >>> from data_formatter.reverse_parser import ReverseParser
-        >>> from data_formatter.reverse_parser.templates.chatml import CHATML_TEMPLATE
-        >>> 
-        >>> parser = ReverseParser(CHATML_TEMPLATE)
-        >>> rendered = "<|im_start|>user\\nHello<|im_end|>"
-        >>> messages = parser.parse(rendered)
-        >>> print(messages)
-        [{"role": "user", "content": "Hello"}]
-    """
-    
-    def __init__(self, template_spec: ChatTemplateSpec, 
-                 allow_empty_content: bool = False):
-        """
-        Initialize reverse parser with template specification.
-        
-        Args:
-            template_spec: Template contract defining delimiters and parsing rules
-            allow_empty_content: Whether to allow messages with empty content
-        """
-        self.template_spec = template_spec
-        self.scanner = Scanner(template_spec)
-        self.parser = MessageParser(template_spec)
-        self.composer = MessageComposer(template_spec, allow_empty_content)
-    
-    def parse(self, rendered_text: str) -> List[Dict[str, str]]:
-        """
-        Parse rendered chat template text into canonical messages.
-        
-        This is the main entry point for reverse parsing. It orchestrates
-        the three-stage pipeline:
-        1. Scanner: Tokenize delimiters
-        2. MessageParser: Extract and validate message blocks
-        3. MessageComposer: Build canonical message structures
-        
-        Args:
-            rendered_text: Text rendered by a chat template
-            
-        Returns:
-            List of canonical messages in format [{"role": str, "content": str}, ...]
-            Messages are returned in the order they appear in the source text.
-            
-        Raises:
-            UnknownDelimiterError: If no valid delimiters found in text
-            NestedBlockError: If nested blocks detected when not allowed
-            UnclosedBlockError: If message block started but not closed
-            MalformedTemplateError: If template structure is invalid
-            EmptyContentError: If empty content found and not allowed
-            
-        Example:
-            >>> parser = ReverseParser(CHATML_TEMPLATE)
-            >>> text = '''<|im_start|>user
-            ... Hello, how are you?<|im_end|>
-            ... <|im_start|>assistant
-            ... I'm doing great!<|im_end|>'''
-            >>> messages = parser.parse(text)
-            >>> len(messages)
-            2
-            >>> messages[0]["role"]
-            'user'
-        """
-        # Validate input
-        if not rendered_text:
-            raise ValueError("Cannot parse empty text")
-        
-        # Stage 1: Scan for delimiter tokens
-        tokens = self.scanner.scan(rendered_text)
-        
-        if not tokens:
-            raise UnknownDelimiterError(
-                f"No valid delimiters found in rendered text. "
-                f"Expected delimiters from template '{self.template_spec.name}': "
-                f"{[spec.start_delimiter for spec in self.template_spec.delimiters]}"
-            )
-        
-        # Stage 2: Parse tokens into message blocks
-        blocks = self.parser.parse(rendered_text, tokens)
-        
-        # Stage 3: Compose canonical messages
-        messages = self.composer.compose(rendered_text, blocks)
-        
-        return messages
+"""Multi-stage reverse parser implementation.
+
+This module implements a PyYAML-inspired pipeline architecture:
+    Scanner → MessageParser → MessageComposer → Canonical Messages
+
+The separation of concerns enables:
+- Testability: Each stage can be unit tested independently
+- Extensibility: Swap components without changing core logic
+- Debuggability: Inspect intermediate tokens/blocks
+"""
+
+import re
+from functools import lru_cache
+from heapq import merge as _heapq_merge
+from operator import attrgetter
+from weakref import WeakValueDictionary
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .template_spec import ChatTemplateSpec
+from .exceptions import (
+    UnknownDelimiterError,
+    NestedBlockError,
+    UnclosedBlockError,
+    EmptyContentError,
+    MalformedTemplateError,
+)
+
+
+@lru_cache(maxsize=64)
+def _compile_delimiter_pattern(delimiters: Tuple[str, ...]) -> "re.Pattern":
+    """
+    Compile the lookahead alternation matching any of the given delimiters.
+
+    Cached at module level so scanners built for the same delimiter set
+    (e.g. repeated ``ReverseParser(CHATML_TEMPLATE)`` construction) share
+    one compiled pattern instead of recompiling per instance.
+
+    Alternatives are ordered longest-first. Validated template specs forbid
+    one delimiter containing another, so ordering cannot matter for them,
+    but it keeps the scan correct for specs that bypass validation.
+    """
+    alternation = "|".join(
+        re.escape(d) for d in sorted(delimiters, key=len, reverse=True)
+    )
+    return re.compile(f"(?=({alternation}))")
+
+
+# Whitespace normalization patterns: strip blanks around newlines, then
+# collapse runs of newlines. [^\S\n] is "whitespace except newline", so
+# \r/\t and friends are eaten the same way per-line str.strip() used to.
+_WS_AROUND_NL = re.compile(r"[^\S\n]*\n[^\S\n]*")
+_MULTI_NL = re.compile(r"\n+")
+
+# Any non-whitespace character; used for copy-free emptiness checks on
+# content spans (search with pos/endpos instead of slicing a substring)
+_NON_WS = re.compile(r"\S")
+
+# C-level sort/merge key for token streams
+_TOKEN_POSITION = attrgetter("position")
+
+
+class Token(NamedTuple):
+    """
+    Represents a delimiter token found in rendered text.
+
+    A NamedTuple rather than a dataclass: one Token is allocated per
+    delimiter hit, and tuples come off CPython's freelist with C-level
+    attribute access, while keeping the same field API.
+
+    Attributes:
+        type: 'start' or 'end'
+        role: Role this delimiter represents
+        position: Character position in source text
+        delimiter: The actual delimiter string
+    """
+    type: str  # 'start' or 'end'
+    role: str
+    position: int
+    delimiter: str
+
+
+class Scanner:
+    """
+    Tokenizes rendered text by identifying delimiter boundaries.
+    
+    First stage in the parsing pipeline. Scans the input text and produces
+    a stream of tokens representing delimiter positions.
+    """
+    
+    def __init__(self, template_spec: ChatTemplateSpec):
+        """
+        Initialize scanner with template specification.
+
+        Builds a delimiter index once: every delimiter string is mapped to the
+        token events it should emit, and a single alternation pattern covering
+        all delimiters is compiled so scanning is one linear pass over the text
+        instead of one `str.find` sweep per delimiter.
+
+        Args:
+            template_spec: Template defining delimiters to scan for
+        """
+        self.template_spec = template_spec
+
+        # Group end delimiters by role to detect shared end delimiters
+        # (same end delimiter used by multiple roles, e.g. ChatML's <|im_end|>)
+        end_delimiter_to_roles: Dict[str, List[str]] = {}
+        for delimiter_spec in template_spec.delimiters:
+            if delimiter_spec.end_delimiter:
+                end_delimiter_to_roles.setdefault(
+                    delimiter_spec.end_delimiter, []
+                ).append(delimiter_spec.role)
+
+        # Map each delimiter string to the (type, role) events it emits.
+        # A delimiter may double as one role's end and another role's start
+        # (position order: end events before start events), so values are tuples.
+        delimiter_events: Dict[str, Tuple[Tuple[str, str], ...]] = {}
+        for end_delim, roles in end_delimiter_to_roles.items():
+            # Shared end delimiters carry an empty role - they close whatever
+            # block is currently open
+            role = roles[0] if len(roles) == 1 else ''
+            delimiter_events[end_delim] = (('end', role),)
+        for delimiter_spec in template_spec.delimiters:
+            start_delim = delimiter_spec.start_delimiter
+            existing = delimiter_events.get(start_delim, ())
+            delimiter_events[start_delim] = existing + (('start', delimiter_spec.role),)
+        self._delimiter_events = delimiter_events
+
+        # One alternation over all delimiters, compiled once per delimiter set.
+        # The zero-width lookahead reports delimiters that begin inside a
+        # previous match (e.g. Llama2's " [/INST]" end overlapping the
+        # "[/INST] " start), matching the semantics of per-delimiter scanning.
+        self._pattern = _compile_delimiter_pattern(tuple(delimiter_events))
+
+    def scan(self, text: str) -> List[Token]:
+        """
+        Scan text and produce delimiter tokens.
+
+        Runs the precompiled alternation in a single pass; tokens are emitted
+        in position order, so no sort is needed.
+
+        Args:
+            text: Rendered chat template text to scan
+
+        Returns:
+            Ordered list of Token objects sorted by position
+        """
+        tokens = []
+        # Hoisted locals: one LOAD_FAST per hit instead of attribute walks
+        tokens_append = tokens.append
+        delimiter_events = self._delimiter_events
+        make_token = Token
+        for match in self._pattern.finditer(text):
+            delimiter = match.group(1)
+            position = match.start()
+            for token_type, role in delimiter_events[delimiter]:
+                tokens_append(make_token(
+                    type=token_type,
+                    role=role,
+                    position=position,
+                    delimiter=delimiter
+                ))
+        return tokens
+
+
+class _SharedEndScanner:
+    """
+    Scanner specialized for templates where every role shares one end
+    delimiter (the ChatML shape: all roles close with <|im_end|>).
+
+    With a single known end string there is no per-hit event dispatch:
+    one pass finds start delimiters (alternation), one finds the end
+    delimiter, and the two token streams are merged by position. Drop-in
+    for Scanner - same Token output, same ''-role shared-end convention.
+    """
+
+    def __init__(self, template_spec: ChatTemplateSpec):
+        self.template_spec = template_spec
+
+        start_to_role = {
+            spec.start_delimiter: spec.role for spec in template_spec.delimiters
+        }
+        self._start_to_role = start_to_role
+        self._start_pattern = _compile_delimiter_pattern(tuple(start_to_role))
+
+        end_delimiter = template_spec.delimiters[0].end_delimiter
+        self._end_delimiter = end_delimiter
+        self._end_pattern = _compile_delimiter_pattern((end_delimiter,))
+        # A shared end closes whatever block is open, so it carries no role -
+        # unless the template only has one role, where the role is determined
+        self._end_role = (
+            template_spec.delimiters[0].role
+            if len(template_spec.delimiters) == 1 else ''
+        )
+
+    def scan(self, text: str) -> List[Token]:
+        """Scan text and produce delimiter tokens ordered by position."""
+        start_to_role = self._start_to_role
+        starts = [
+            Token(
+                type='start',
+                role=start_to_role[match.group(1)],
+                position=match.start(),
+                delimiter=match.group(1),
+            )
+            for match in self._start_pattern.finditer(text)
+        ]
+        end_role = self._end_role
+        end_delimiter = self._end_delimiter
+        ends = [
+            Token(
+                type='end',
+                role=end_role,
+                position=match.start(),
+                delimiter=end_delimiter,
+            )
+            for match in self._end_pattern.finditer(text)
+        ]
+        # finditer yields each run already position-sorted; a two-way
+        # heapq.merge with a C-level attrgetter key is O(K) with no Python
+        # comparator. Positions cannot tie across the runs - that would
+        # need one delimiter to be a prefix of another, which validate()
+        # rejects.
+        return list(_heapq_merge(starts, ends, key=_TOKEN_POSITION))
+
+
+@lru_cache(maxsize=16)
+def _build_scanner(template_spec: ChatTemplateSpec) -> "Scanner":
+    """
+    Return a shared scanner for the given (hashable, frozen) template spec.
+
+    Scanners are immutable after construction, so parsers built repeatedly
+    for the same template (e.g. one ReverseParser per sample in a batch
+    loop) reuse one scanner and its compiled pattern. Templates where all
+    roles share a single end delimiter get the specialized scanner.
+    """
+    end_delimiters = {spec.end_delimiter for spec in template_spec.delimiters}
+    if len(end_delimiters) == 1 and None not in end_delimiters:
+        return _SharedEndScanner(template_spec)
+    return Scanner(template_spec)
+
+
+class MessageBlock(NamedTuple):
+    """
+    Intermediate representation of a message block.
+
+    Represents a parsed message block with its content boundaries.
+    NamedTuple for the same allocation reasons as Token; attribute-style
+    access is preserved for external consumers.
+
+    Attributes:
+        role: Message role (user, assistant, system, etc.)
+        content_start: Start position of message content
+        content_end: End position of message content
+        start_token: Token that started this block
+        end_token: Token that ended this block (None for prefix-only)
+    """
+    role: str
+    content_start: int
+    content_end: int
+    start_token: Token
+    end_token: Optional[Token] = None
+
+
+class MessageParser:
+    """
+    Parses token stream into message blocks.
+    
+    Second stage in the parsing pipeline. Takes tokens from Scanner
+    and validates structure while extracting message boundaries.
+    """
+    
+    def __init__(self, template_spec: ChatTemplateSpec):
+        """
+        Initialize parser with template specification.
+        
+        Args:
+            template_spec: Template defining parsing rules
+        """
+        self.template_spec = template_spec
+        
+    def parse(self, text: str, tokens: List[Token]) -> List[MessageBlock]:
+        """
+        Parse tokens into message blocks.
+        
+        Validates:
+        - Properly paired delimiters
+        - No overlapping blocks (unless nesting allowed)
+        - No unexpected nesting
+        
+        Args:
+            text: Original source text (for position validation)
+            tokens: Token stream from Scanner
+            
+        Returns:
+            List of MessageBlock objects
+            
+        Raises:
+            NestedBlockError: If nested blocks detected when not allowed
+            UnclosedBlockError: If block started but not closed
+            MalformedTemplateError: If delimiter pairing is invalid
+        """
+        blocks = []
+        # Stack of open blocks as indices into tokens: pushing an int keeps
+        # the loop on LOAD_FAST/BINARY_SUBSCR instead of attribute walks
+        stack: List[int] = []
+
+        # Hoist spec lookups out of the per-token loop
+        allow_nesting = self.template_spec.allow_nesting
+        role_to_spec = self.template_spec._role_to_spec
+        stack_append = stack.append
+        stack_pop = stack.pop
+        blocks_append = blocks.append
+
+        for i, token in enumerate(tokens):
+            if token.type == 'start':
+                # Check for invalid nesting
+                if stack and not allow_nesting:
+                    open_token = tokens[stack[-1]]
+                    raise NestedBlockError(
+                        f"Nested message blocks detected at position {token.position}. "
+                        f"Open block for role '{open_token.role}' at position {open_token.position}, "
+                        f"new block for role '{token.role}' at position {token.position}"
+                    )
+                stack_append(i)
+
+            elif token.type == 'end':
+                if not stack:
+                    raise UnclosedBlockError(
+                        f"Unmatched end delimiter '{token.delimiter}' at position {token.position}. "
+                        f"No corresponding start delimiter found."
+                    )
+                
+                start_i = stack_pop()
+                start_token = tokens[start_i]
+
+                # For shared end delimiters (like <|im_end|>), role doesn't matter
+                # Just verify the delimiter strings match the template spec
+                delimiter_spec = role_to_spec.get(start_token.role)
+                if delimiter_spec and delimiter_spec.end_delimiter:
+                    # If end delimiter is specified for this role, check it matches
+                    if token.delimiter != delimiter_spec.end_delimiter:
+                        # This end token doesn't match the expected end for this role
+                        # Put start token back on stack and skip this end token
+                        stack_append(start_i)
+                        continue
+                
+                # Calculate content positions
+                content_start = start_token.position + len(start_token.delimiter)
+                content_end = token.position
+                
+                blocks_append(MessageBlock(
+                    role=start_token.role,
+                    content_start=content_start,
+                    content_end=content_end,
+                    start_token=start_token,
+                    end_token=token
+                ))
+        
+        # Check for unclosed blocks
+        if stack:
+            unclosed = tokens[stack[-1]]
+            raise UnclosedBlockError(
+                f"Unclosed message block for role '{unclosed.role}' "
+                f"starting at position {unclosed.position}. "
+                f"Expected closing delimiter '{self.template_spec.get_delimiter_for_role(unclosed.role).end_delimiter}'"
+            )
+        
+        return blocks
+
+
+class MessageComposer:
+    """
+    Composes canonical messages from message blocks.
+    
+    Third stage in the parsing pipeline. Takes validated message blocks
+    and produces the final canonical message format.
+    """
+    
+    def __init__(self, template_spec: ChatTemplateSpec, 
+                 allow_empty_content: bool = False):
+        """
+        Initialize composer with template specification.
+        
+        Args:
+            template_spec: Template defining composition rules
+            allow_empty_content: Whether to allow messages with empty content
+        """
+        self.template_spec = template_spec
+        self.allow_empty_content = allow_empty_content
+        
+    def compose(self, text: str, blocks: List[MessageBlock]) -> List[Dict[str, str]]:
+        """
+        Compose canonical message list from blocks.
+        
+        Args:
+            text: Original source text
+            blocks: Validated message blocks from MessageParser
+            
+        Returns:
+            List of {"role": str, "content": str} dicts in canonical format
+            
+        Raises:
+            EmptyContentError: If empty content found and not allowed
+        """
+        messages = []
+
+        # Hoist per-block lookups
+        normalize_whitespace = self.template_spec.normalize_whitespace
+        allow_empty_content = self.allow_empty_content
+        normalize = self._normalize_whitespace
+        messages_append = messages.append
+
+        for block in blocks:
+            # Extract content using block boundaries
+            content = text[block.content_start:block.content_end]
+
+            # Normalize whitespace if configured
+            if normalize_whitespace:
+                content = normalize(content)
+
+            # Check empty content policy
+            if not content.strip() and not allow_empty_content:
+                raise EmptyContentError(
+                    f"Empty content for role '{block.role}' at position {block.start_token.position}. "
+                    f"Set allow_empty_content=True to permit empty messages."
+                )
+            
+            messages_append({
+                "role": block.role,
+                "content": content
+            })
+        
+        return messages
+    
+    def compose_to_arrays(self, text: str, blocks: List[MessageBlock]):
+        """
+        Structure-of-arrays variant of compose: no content copies.
+
+        Returns (roles, content_starts, content_ends) - parallel lists where
+        each content span indexes into the original text. Callers that only
+        need a subset of messages (or want to batch-slice) avoid one
+        substring allocation per message. Whitespace normalization is not
+        applied; spans address the raw text, so callers slice and normalize
+        on demand.
+
+        Raises:
+            EmptyContentError: If empty content found and not allowed
+        """
+        roles: List[str] = []
+        content_starts: List[int] = []
+        content_ends: List[int] = []
+        allow_empty_content = self.allow_empty_content
+        non_ws_search = _NON_WS.search
+
+        for block in blocks:
+            start = block.content_start
+            end = block.content_end
+            # pos/endpos-bounded search: emptiness check without slicing
+            if not allow_empty_content and non_ws_search(text, start, end) is None:
+                raise EmptyContentError(
+                    f"Empty content for role '{block.role}' at position "
+                    f"{block.start_token.position}. "
+                    f"Set allow_empty_content=True to permit empty messages."
+                )
+            roles.append(block.role)
+            content_starts.append(start)
+            content_ends.append(end)
+
+        return roles, content_starts, content_ends
+
+    def _normalize_whitespace(self, text: str) -> str:
+        """
+        Normalize whitespace while preserving content structure.
+        
+        - Strips leading/trailing whitespace
+        - Preserves newlines for multi-line content
+        - Removes empty lines
+        
+        Args:
+            text: Text to normalize
+            
+        Returns:
+            Normalized text
+        """
+        # Two C-level regex passes replace the strip/split/listcomp/join
+        # chain: trim blanks around each newline, then collapse newline runs
+        return _MULTI_NL.sub('\n', _WS_AROUND_NL.sub('\n', text.strip()))
+
+
+# Shared ReverseParser instances keyed by (spec, allow_empty_content);
+# weak values so cached parsers die with their last outside reference
+_parser_instances: "WeakValueDictionary" = WeakValueDictionary()
+
+
+class ReverseParser:
+    """
+    High-level reverse parser orchestrating the multi-stage pipeline.
+    
+    Pipeline: Scanner → MessageParser → MessageComposer → Canonical Messages
+    
+    This class provides the main API for reverse parsing rendered chat
+    template text back into canonical message structures.
+    
+    Example:
+        >>> from data_formatter.reverse_parser import ReverseParser
+        >>> from data_formatter.reverse_parser.templates.chatml import CHATML_TEMPLATE
+        >>> 
+        >>> parser = ReverseParser(CHATML_TEMPLATE)
+        >>> rendered = "<|im_start|>user\\nHello<|im_end|>"
+        >>> messages = parser.parse(rendered)
+        >>> print(messages)
+        [{"role": "user", "content": "Hello"}]
+    """
+    
+    def __init__(self, template_spec: ChatTemplateSpec, 
+                 allow_empty_content: bool = False):
+        """
+        Initialize reverse parser with template specification.
+        
+        Args:
+            template_spec: Template contract defining delimiters and parsing rules
+            allow_empty_content: Whether to allow messages with empty content
+        """
+        self.template_spec = template_spec
+        self.scanner = _build_scanner(template_spec)
+        self.parser = MessageParser(template_spec)
+        self.composer = MessageComposer(template_spec, allow_empty_content)
+
+    @classmethod
+    def for_template(cls, template_spec: ChatTemplateSpec,
+                     allow_empty_content: bool = False) -> "ReverseParser":
+        """
+        Return a shared parser for the given template specification.
+
+        Constructing a ReverseParser per message is a common caller pattern;
+        this dedupes the setup. Parsers hold no per-parse state, so sharing
+        one instance across parse() calls is safe. Entries are weakly held -
+        a cached parser lives only as long as some caller references it.
+
+        Args:
+            template_spec: Template contract defining delimiters and parsing rules
+            allow_empty_content: Whether to allow messages with empty content
+
+        Returns:
+            A (possibly shared) ReverseParser instance
+        """
+        key = (template_spec, allow_empty_content)
+        parser = _parser_instances.get(key)
+        if parser is None:
+            parser = cls(template_spec, allow_empty_content)
+            _parser_instances[key] = parser
+        return parser
+
+    def parse(self, rendered_text: str) -> List[Dict[str, str]]:
+        """
+        Parse rendered chat template text into canonical messages.
+        
+        This is the main entry point for reverse parsing. It orchestrates
+        the three-stage pipeline:
+        1. Scanner: Tokenize delimiters
+        2. MessageParser: Extract and validate message blocks
+        3. MessageComposer: Build canonical message structures
+        
+        Args:
+            rendered_text: Text rendered by a chat template
+            
+        Returns:
+            List of canonical messages in format [{"role": str, "content": str}, ...]
+            Messages are returned in the order they appear in the source text.
+            
+        Raises:
+            UnknownDelimiterError: If no valid delimiters found in text
+            NestedBlockError: If nested blocks detected when not allowed
+            UnclosedBlockError: If message block started but not closed
+            MalformedTemplateError: If template structure is invalid
+            EmptyContentError: If empty content found and not allowed
+            
+        Example:
+            >>> parser = ReverseParser(CHATML_TEMPLATE)
+            >>> text = '''<|im_start|>user
+            ... Hello, how are you?<|im_end|>
+            ... <|im_start|>assistant
+            ... I'm doing great!<|im_end|>'''
+            >>> messages = parser.parse(text)
+            >>> len(messages)
+            2
+            >>> messages[0]["role"]
+            'user'
+        """
+        # Validate input
+        if not rendered_text:
+            raise ValueError("Cannot parse empty text")
+        
+        # Stage 1: Scan for delimiter tokens
+        tokens = self.scanner.scan(rendered_text)
+        
+        if not tokens:
+            raise UnknownDelimiterError(
+                f"No valid delimiters found in rendered text. "
+                f"Expected delimiters from template '{self.template_spec.name}': "
+                f"{[spec.start_delimiter for spec in self.template_spec.delimiters]}"
+            )
+        
+        # Stage 2: Parse tokens into message blocks
+        blocks = self.parser.parse(rendered_text, tokens)
+
+        # Stage 3: Compose canonical messages
+        messages = self.composer.compose(rendered_text, blocks)
+
+        return messages
+
+    def parse_many(self, texts: Iterable[str]) -> Iterator[List[Dict[str, str]]]:
+        """
+        Parse an iterable of rendered texts, yielding one message list each.
+
+        Batch variant of parse() for corpora: the pipeline stage methods are
+        bound once outside the loop instead of re-resolved per document, and
+        results stream out lazily so the whole corpus is never materialized.
+        Error semantics per document are identical to parse().
+
+        Args:
+            texts: Iterable of rendered chat template texts
+
+        Yields:
+            List of canonical messages for each input text, in order
+        """
+        scan = self.scanner.scan
+        parse_tokens = self.parser.parse
+        compose = self.composer.compose
+        template_spec = self.template_spec
+
+        for text in texts:
+            if not text:
+                raise ValueError("Cannot parse empty text")
+
+            tokens = scan(text)
+            if not tokens:
+                raise UnknownDelimiterError(
+                    f"No valid delimiters found in rendered text. "
+                    f"Expected delimiters from template '{template_spec.name}': "
+                    f"{[spec.start_delimiter for spec in template_spec.delimiters]}"
+                )
+
+            yield compose(text, parse_tokens(text, tokens))
@@ -1,5 +1,19 @@
 """Stylings package."""
 
+import sys
+
+# Intern the schema keys and role names the converters probe on every
+# message: guarantees the pointer-equality fast path in dict lookups.
+# Most are interned as code constants already; this makes it explicit
+# and covers values arriving from parsed input files.
+for _key in (
+    "messages", "content", "role", "from", "value", "conversations",
+    "instruction", "input", "output", "text", "label",
+    "human", "gpt", "system", "user", "assistant",
+):
+    sys.intern(_key)
+del _key
+
 from data_formatter.stylings.base import BaseStyling
 from data_formatter.stylings.text_label import TextLabelStyling
 from data_formatter.stylings.openai_chat import OpenAIChatStyling
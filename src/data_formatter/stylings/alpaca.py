@@ -1,10 +1,15 @@
 """Alpaca format styling converter."""
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from data_formatter.ir import DataSample
-from data_formatter.stylings.base import BaseStyling
+from data_formatter.stylings.base import BaseStyling, _detect_schema
 from data_formatter.registry import styling_registry
 
+# The full Alpaca schema; samples whose keys are a subset need no rebuild
+_ALPACA_KEYS = frozenset(("instruction", "input", "output"))
+# At least one of these must be present for a sample to count as Alpaca
+_ALPACA_REQUIRED = frozenset(("instruction", "output"))
+
 
 @styling_registry.register("alpaca")
 class AlpacaStyling(BaseStyling):
@@ -20,8 +25,9 @@ class AlpacaStyling(BaseStyling):
 
     def to_ir(self, data: Dict[str, Any]) -> DataSample:
         """Convert from Alpaca format to IR."""
-        # Validate format
-        if "instruction" not in data and "output" not in data:
+        # Validate format: one C-level disjointness test instead of two
+        # membership probes per sample
+        if data.keys().isdisjoint(_ALPACA_REQUIRED):
             raise ValueError("Alpaca format requires at least 'instruction' or 'output' field")
         
         return DataSample(data=data)
@@ -31,69 +37,85 @@ class AlpacaStyling(BaseStyling):
         data = sample.data
         
         # If already in Alpaca format, return as-is
-        if "instruction" in data or "output" in data:
-            result = {}
-            if "instruction" in data:
-                result["instruction"] = data["instruction"]
-            if "input" in data:
-                result["input"] = data["input"]
-            if "output" in data:
-                result["output"] = data["output"]
-            return result
-        
-        # Convert from OpenAI chat format
-        if "messages" in data and isinstance(data["messages"], list):
-            messages = data["messages"]
-            result = {"instruction": "", "input": "", "output": ""}
-            
-            for msg in messages:
-                role = msg.get("role", "")
-                content = msg.get("content", "")
-                
-                if role == "system":
-                    # System message becomes part of instruction
-                    result["instruction"] = content
-                elif role == "user":
-                    # User message is the instruction (or input if instruction exists)
-                    if not result["instruction"]:
-                        result["instruction"] = content
-                    else:
-                        result["input"] = content
-                elif role == "assistant":
-                    # Assistant message is the output
-                    result["output"] = content
-            
-            # Remove empty input field
-            if not result["input"]:
-                del result["input"]
-            
-            return result
-        
-        # Convert from ShareGPT format
-        if "conversations" in data:
-            result = {"instruction": "", "input": "", "output": ""}
-            
-            for conv in data["conversations"]:
-                from_who = conv.get("from", "")
-                value = conv.get("value", "")
-                
-                if from_who == "system":
-                    result["instruction"] = value
-                elif from_who == "human":
-                    if not result["instruction"]:
-                        result["instruction"] = value
-                    else:
-                        result["input"] = value
-                elif from_who == "gpt":
-                    result["output"] = value
-            
-            if not result["input"]:
-                del result["input"]
-            
-            return result
+        if not data.keys().isdisjoint(_ALPACA_REQUIRED):
+            if data.keys() <= _ALPACA_KEYS:
+                # Pure Alpaca sample: nothing to strip, skip the copy
+                return data
+            return {k: data[k] for k in ("instruction", "input", "output") if k in data}
         
+        handler = self._FROM_IR_DISPATCH.get(_detect_schema(data))
+        if handler is not None:
+            result = handler(self, data)
+            if result is not None:
+                return result
+
         # Fallback
         return {
             "instruction": str(data),
             "output": ""
         }
+
+    def _from_openai(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Convert OpenAI messages to instruction/input/output."""
+        messages = data["messages"]
+        if not isinstance(messages, list):
+            # Malformed payload; let from_ir fall back
+            return None
+        result = {"instruction": "", "input": "", "output": ""}
+
+        for msg in messages:
+            role = msg.get("role", "")
+            content = msg.get("content", "")
+
+            if role == "system":
+                # System message becomes part of instruction
+                result["instruction"] = content
+            elif role == "user":
+                # User message is the instruction (or input if instruction exists)
+                if not result["instruction"]:
+                    result["instruction"] = content
+                else:
+                    result["input"] = content
+            elif role == "assistant":
+                # Assistant message is the output
+                result["output"] = content
+
+        # Remove empty input field
+        if not result["input"]:
+            del result["input"]
+
+        return result
+
+    def _from_sharegpt(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Convert ShareGPT conversations to instruction/input/output."""
+        conversations = data["conversations"]
+        if not isinstance(conversations, list):
+            # Malformed payload; let from_ir fall back
+            return None
+        result = {"instruction": "", "input": "", "output": ""}
+
+        for conv in conversations:
+            from_who = conv.get("from", "")
+            value = conv.get("value", "")
+
+            if from_who == "system":
+                result["instruction"] = value
+            elif from_who == "human":
+                if not result["instruction"]:
+                    result["instruction"] = value
+                else:
+                    result["input"] = value
+            elif from_who == "gpt":
+                result["output"] = value
+
+        if not result["input"]:
+            del result["input"]
+
+        return result
+
+    # Source schema -> conversion handler; resolved with one lookup in
+    # from_ir instead of a cascade of `in` tests
+    _FROM_IR_DISPATCH = {
+        "openai": _from_openai,
+        "sharegpt": _from_sharegpt,
+    }
@@ -1,13 +1,49 @@
 """Base class for styling converters."""
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from data_formatter.ir import IntermediateRepresentation, DataSample
 
+# Schema-marker key -> canonical source schema. Shared by the from_ir
+# dispatch tables so source detection is one dict lookup per data key
+# instead of a chain of `in` tests repeated in every styling.
+_SCHEMA_MARKERS = {
+    "messages": "openai",
+    "conversations": "sharegpt",
+    "instruction": "alpaca",
+    "output": "alpaca",
+    "text": "chatml",
+}
+
+
+def _detect_schema(data: Dict[str, Any]) -> Optional[str]:
+    """Return the canonical source schema name for data, or None."""
+    markers = _SCHEMA_MARKERS
+    return next((markers[k] for k in data if k in markers), None)
+
+
+# ReverseParser is bound lazily: importing it here at module level would
+# pull the whole reverse_parser package into every stylings import, and
+# the package __init__ deliberately defers submodule loading
+_ReverseParser = None
+
+
+def _reverse_parser_cls():
+    """Bind and cache the ReverseParser class on first use."""
+    global _ReverseParser
+    if _ReverseParser is None:
+        from data_formatter.reverse_parser import ReverseParser as _ReverseParser
+    return _ReverseParser
+
 
 class BaseStyling(ABC):
     """Abstract base class for all styling converters."""
 
+    # Reverse parser memoized by reverse_parse; class-level defaults so
+    # subclasses need no __init__
+    _cached_parser = None
+    _cached_spec = None
+
     @abstractmethod
     def to_ir(self, data: Dict[str, Any]) -> DataSample:
         """
@@ -25,15 +61,38 @@ class BaseStyling(ABC):
     def from_ir(self, sample: DataSample) -> Dict[str, Any]:
         """
         Convert from intermediate representation to this styling.
-        
+
+        Samples may arrive straight from a parser without a to_ir pass,
+        so implementations must not assume schema fields have valid
+        container types; malformed payloads degrade to the fallback
+        conversion rather than raising.
+
         Args:
             sample: DataSample in IR format
-            
+
         Returns:
             Data in this specific styling format
         """
         pass
-    
+
+    def from_ir_batch(self, samples: List[DataSample]) -> List[Dict[str, Any]]:
+        """
+        Convert a batch of IR samples to this styling.
+
+        Default implementation binds from_ir once and maps it over the
+        batch. Stylings with a dominant homogeneous case can override this
+        to hoist per-sample work (see ShareGPTStyling) - the converter
+        drives whole-dataset styling passes through this entry point.
+
+        Args:
+            samples: DataSamples in IR format
+
+        Returns:
+            List of converted data dicts, in input order
+        """
+        from_ir = self.from_ir
+        return [from_ir(sample) for sample in samples]
+
     def get_template_spec(self) -> Optional[Any]:
         """
         Return template specification if styling supports reverse parsing.
@@ -77,11 +136,16 @@ class BaseStyling(ABC):
                 f"{self.__class__.__name__} does not support reverse parsing. "
                 f"Override get_template_spec() to enable this feature."
             )
-        
-        # Import here to avoid circular dependency
-        from data_formatter.reverse_parser import ReverseParser
-        
-        parser = ReverseParser(template_spec)
+
+        # Reuse the parser across calls; template specs are immutable, so
+        # the cache only needs invalidating if a subclass starts returning
+        # a different spec object
+        parser = self._cached_parser
+        if parser is None or self._cached_spec is not template_spec:
+            parser = _reverse_parser_cls().for_template(template_spec)
+            self._cached_parser = parser
+            self._cached_spec = template_spec
+
         messages = parser.parse(rendered_text)
         return DataSample(data={"messages": messages})
 
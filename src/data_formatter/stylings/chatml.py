@@ -1,76 +1,111 @@
-"""ChatML format styling converter."""
-
-from typing import Dict, Any
-from data_formatter.ir import DataSample
-from data_formatter.stylings.base import BaseStyling
-from data_formatter.registry import styling_registry
-
-
-@styling_registry.register("chatml")
-class ChatMLStyling(BaseStyling):
-    """
-    ChatML format styling with special tokens.
-    
-    Format: {
-        "text": "<|im_start|>system\\n...\\n<|im_end|>\\n<|im_start|>user\\n...\\n<|im_end|>\\n..."
-    }
-    
-    Uses special tokens: <|im_start|>, <|im_end|>
-    """
-
-    def get_template_spec(self):
-        """Return ChatML template specification for reverse parsing."""
-        from data_formatter.reverse_parser import CHATML_TEMPLATE
-        return CHATML_TEMPLATE
-
-    def to_ir(self, data: Dict[str, Any]) -> DataSample:
-        """Convert from ChatML format to IR using reverse parser."""
-        if "text" not in data:
-            raise ValueError("ChatML format requires 'text' field")
-        
-        # Use reverse parser for robust parsing
-        return self.reverse_parse(data["text"])
-
-    def from_ir(self, sample: DataSample) -> Dict[str, Any]:
-        """Convert from IR to ChatML format."""
-        data = sample.data
-        
-        # If already in ChatML format, return as-is
-        if "text" in data and "<|im_start|>" in str(data["text"]):
-            return data
-        
-        # Convert from message-based formats
-        messages = None
-        
-        if "messages" in data and isinstance(data["messages"], list):
-            messages = data["messages"]
-        elif "conversations" in data and isinstance(data["conversations"], list):
-            # Convert from ShareGPT
-            messages = []
-            for conv in data["conversations"]:
-                role_map = {"human": "user", "gpt": "assistant", "system": "system"}
-                role = role_map.get(conv.get("from", ""), "user")
-                messages.append({"role": role, "content": conv.get("value", "")})
-        elif "instruction" in data or "output" in data:
-            # Convert from Alpaca
-            messages = []
-            if "instruction" in data:
-                user_content = data["instruction"]
-                if "input" in data and data["input"]:
-                    user_content += f"\n{data['input']}"
-                messages.append({"role": "user", "content": user_content})
-            if "output" in data:
-                messages.append({"role": "assistant", "content": data["output"]})
-        
-        if not messages:
-            # Fallback
-            messages = [{"role": "user", "content": str(data)}]
-        
-        # Build ChatML text
-        chatml_parts = []
-        for msg in messages:
-            role = msg.get("role", "user")
-            content = msg.get("content", "")
-            chatml_parts.append(f"<|im_start|>{role}\n{content}<|im_end|>")
-        
-        return {"text": "\n".join(chatml_parts)}
+"""ChatML format styling converter."""
+
+from typing import Dict, Any
+from data_formatter.ir import DataSample
+from data_formatter.stylings.base import BaseStyling, _detect_schema
+from data_formatter.registry import styling_registry
+
+# ShareGPT speaker -> ChatML/OpenAI role; module constant so no dict is
+# allocated per message
+_SHAREGPT_TO_OPENAI = {"human": "user", "gpt": "assistant", "system": "system"}
+
+
+@styling_registry.register("chatml")
+class ChatMLStyling(BaseStyling):
+    """
+    ChatML format styling with special tokens.
+    
+    Format: {
+        "text": "<|im_start|>system\\n...\\n<|im_end|>\\n<|im_start|>user\\n...\\n<|im_end|>\\n..."
+    }
+    
+    Uses special tokens: <|im_start|>, <|im_end|>
+    """
+
+    def get_template_spec(self):
+        """Return ChatML template specification for reverse parsing."""
+        from data_formatter.reverse_parser import CHATML_TEMPLATE
+        return CHATML_TEMPLATE
+
+    def to_ir(self, data: Dict[str, Any]) -> DataSample:
+        """Convert from ChatML format to IR using reverse parser."""
+        if "text" not in data:
+            raise ValueError("ChatML format requires 'text' field")
+        
+        # Use reverse parser for robust parsing
+        return self.reverse_parse(data["text"])
+
+    def from_ir(self, sample: DataSample) -> Dict[str, Any]:
+        """Convert from IR to ChatML format."""
+        data = sample.data
+        
+        # If already in ChatML format, return as-is
+        text = data.get("text")
+        if text is not None and "<|im_start|>" in str(text):
+            return data
+        
+        # Convert from message-based formats
+        handler = self._MESSAGES_DISPATCH.get(_detect_schema(data))
+        messages = handler(self, data) if handler is not None else None
+
+        if not messages:
+            # Fallback
+            messages = [{"role": "user", "content": str(data)}]
+
+        # Build ChatML text as one flat list of literal chunks with a single
+        # join - no per-message f-string intermediates
+        chatml_parts = []
+        extend = chatml_parts.extend
+        for msg in messages:
+            extend((
+                "<|im_start|>", msg.get("role", "user"), "\n",
+                msg.get("content", ""), "<|im_end|>\n",
+            ))
+        # rstrip drops only the separator after the final <|im_end|>
+        return {"text": "".join(chatml_parts).rstrip("\n")}
+
+    def _messages_from_openai(self, data: Dict[str, Any]):
+        """OpenAI samples already carry a messages list."""
+        messages = data["messages"]
+        return messages if isinstance(messages, list) else None
+
+    def _messages_from_sharegpt(self, data: Dict[str, Any]):
+        """Convert ShareGPT conversations to a messages list."""
+        conversations = data["conversations"]
+        if not isinstance(conversations, list):
+            # Malformed payload; let from_ir fall back
+            return None
+        # One comprehension sizes the list in a single allocation instead
+        # of growing it append by append
+        role_get = _SHAREGPT_TO_OPENAI.get
+        return [
+            {
+                "role": role_get(conv.get("from", ""), "user"),
+                "content": conv.get("value", ""),
+            }
+            for conv in conversations
+        ]
+
+    def _messages_from_alpaca(self, data: Dict[str, Any]):
+        """Convert Alpaca instruction/input/output to a messages list."""
+        messages = []
+        instruction = data.get("instruction")
+        if instruction is not None:
+            # Combine instruction and input in one allocation
+            inp = data.get("input")
+            messages.append({
+                "role": "user",
+                "content": f"{instruction}\n{inp}" if inp else instruction,
+            })
+        output = data.get("output")
+        if output is not None:
+            messages.append({"role": "assistant", "content": output})
+        return messages
+
+    # Source schema -> messages extractor; resolved with one lookup in
+    # from_ir instead of a cascade of `in` tests
+    _MESSAGES_DISPATCH = {
+        "openai": _messages_from_openai,
+        "sharegpt": _messages_from_sharegpt,
+        "alpaca": _messages_from_alpaca,
+    }
@@ -1,87 +1,132 @@
-"""ShareGPT format styling converter."""
-
-from typing import Dict, Any
-from data_formatter.ir import DataSample
-from data_formatter.stylings.base import BaseStyling
-from data_formatter.registry import styling_registry
-
-
-@styling_registry.register("sharegpt")
-class ShareGPTStyling(BaseStyling):
-    """
-    ShareGPT format styling.
-    
-    Format: {
-        "conversations": [
-            {"from": "human", "value": "..."},
-            {"from": "gpt", "value": "..."}
-        ]
-    }
-    """
-
-    def to_ir(self, data: Dict[str, Any]) -> DataSample:
-        """Convert from ShareGPT format to IR."""
-        # Validate format
-        if "conversations" not in data:
-            raise ValueError("ShareGPT format requires 'conversations' field")
-        
-        conversations = data["conversations"]
-        if not isinstance(conversations, list):
-            raise ValueError("'conversations' must be a list")
-        
-        for conv in conversations:
-            if not isinstance(conv, dict) or "from" not in conv or "value" not in conv:
-                raise ValueError("Each conversation must have 'from' and 'value' fields")
-        
-        return DataSample(data=data)
-
-    def from_ir(self, sample: DataSample) -> Dict[str, Any]:
-        """Convert from IR to ShareGPT format."""
-        data = sample.data
-        
-        # If already in ShareGPT format, return as-is
-        if "conversations" in data and isinstance(data["conversations"], list):
-            return data
-        
-        # Convert from OpenAI chat format
-        if "messages" in data and isinstance(data["messages"], list):
-            conversations = []
-            for msg in data["messages"]:
-                role = msg.get("role", "")
-                content = msg.get("content", "")
-                
-                # Map OpenAI roles to ShareGPT roles
-                role_map = {"user": "human", "assistant": "gpt", "system": "system"}
-                from_who = role_map.get(role, "human")
-                
-                conversations.append({
-                    "from": from_who,
-                    "value": content
-                })
-            
-            return {"conversations": conversations}
-        
-        # Convert from Alpaca format
-        if "instruction" in data or "output" in data:
-            conversations = []
-            
-            # Instruction + input becomes human message
-            human_msg = data.get("instruction", "")
-            if "input" in data and data["input"]:
-                human_msg += f"\n{data['input']}"
-            
-            if human_msg:
-                conversations.append({"from": "human", "value": human_msg})
-            
-            # Output becomes gpt message
-            if "output" in data:
-                conversations.append({"from": "gpt", "value": data["output"]})
-            
-            return {"conversations": conversations}
-        
-        # Fallback
-        return {
-            "conversations": [
-                {"from": "human", "value": str(data)}
-            ]
-        }
+"""ShareGPT format styling converter."""
+
+from typing import Dict, Any, Optional
+from data_formatter.ir import DataSample
+from data_formatter.stylings.base import BaseStyling, _detect_schema
+from data_formatter.registry import styling_registry
+
+# OpenAI role -> ShareGPT speaker; module constant so no dict is
+# allocated per message
+_OPENAI_TO_SHAREGPT = {"user": "human", "assistant": "gpt", "system": "system"}
+
+
+@styling_registry.register("sharegpt")
+class ShareGPTStyling(BaseStyling):
+    """
+    ShareGPT format styling.
+    
+    Format: {
+        "conversations": [
+            {"from": "human", "value": "..."},
+            {"from": "gpt", "value": "..."}
+        ]
+    }
+    """
+
+    def to_ir(self, data: Dict[str, Any]) -> DataSample:
+        """Convert from ShareGPT format to IR."""
+        # Validate format
+        if "conversations" not in data:
+            raise ValueError("ShareGPT format requires 'conversations' field")
+        
+        conversations = data["conversations"]
+        if not isinstance(conversations, list):
+            raise ValueError("'conversations' must be a list")
+        
+        for conv in conversations:
+            if not isinstance(conv, dict) or "from" not in conv or "value" not in conv:
+                raise ValueError("Each conversation must have 'from' and 'value' fields")
+        
+        return DataSample(data=data)
+
+    def from_ir(self, sample: DataSample) -> Dict[str, Any]:
+        """Convert from IR to ShareGPT format."""
+        data = sample.data
+        
+        # If already in ShareGPT format, return as-is
+        if "conversations" in data and isinstance(data["conversations"], list):
+            return data
+
+        handler = self._FROM_IR_DISPATCH.get(_detect_schema(data))
+        if handler is not None:
+            result = handler(self, data)
+            if result is not None:
+                return result
+
+        # Fallback
+        return {
+            "conversations": [
+                {"from": "human", "value": str(data)}
+            ]
+        }
+
+    def _from_openai(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Convert OpenAI messages to conversations."""
+        messages = data["messages"]
+        if not isinstance(messages, list):
+            # Malformed payload; let from_ir fall back
+            return None
+        # One comprehension sizes the list in a single allocation instead
+        # of growing it append by append
+        role_get = _OPENAI_TO_SHAREGPT.get
+        return {"conversations": [
+            {
+                "from": role_get(msg.get("role", ""), "human"),
+                "value": msg.get("content", ""),
+            }
+            for msg in messages
+        ]}
+
+    def _from_alpaca(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert Alpaca instruction/input/output to conversations."""
+        conversations = []
+
+        # Instruction + input becomes human message, combined in one allocation
+        instruction = data.get("instruction", "")
+        inp = data.get("input")
+        human_msg = f"{instruction}\n{inp}" if inp else instruction
+
+        if human_msg:
+            conversations.append({"from": "human", "value": human_msg})
+
+        # Output becomes gpt message
+        output = data.get("output")
+        if output is not None:
+            conversations.append({"from": "gpt", "value": output})
+
+        return {"conversations": conversations}
+
+    # Source schema -> conversion handler; resolved with one lookup in
+    # from_ir instead of a cascade of `in` tests
+    _FROM_IR_DISPATCH = {
+        "openai": _from_openai,
+        "alpaca": _from_alpaca,
+    }
+
+    def from_ir_batch(self, samples) -> list:
+        """
+        Batch conversion with a fast path for OpenAI-message samples.
+
+        The dominant bulk conversion is messages -> conversations; those
+        samples are handled with a hoisted role map and one comprehension
+        per sample, everything else falls through to from_ir. Output is
+        identical to mapping from_ir over the batch.
+        """
+        role_get = _OPENAI_TO_SHAREGPT.get
+        from_ir = self.from_ir
+        results = []
+        append = results.append
+        for sample in samples:
+            data = sample.data
+            messages = data.get("messages")
+            if isinstance(messages, list) and "conversations" not in data:
+                append({"conversations": [
+                    {
+                        "from": role_get(msg.get("role", ""), "human"),
+                        "value": msg.get("content", ""),
+                    }
+                    for msg in messages
+                ]})
+            else:
+                append(from_ir(sample))
+        return results
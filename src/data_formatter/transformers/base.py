@@ -1,7 +1,7 @@
 """Base class for data transformers."""
 
 from abc import ABC, abstractmethod
-from data_formatter.ir import IntermediateRepresentation
+from data_formatter.ir import IntermediateRepresentation, DataSample
 
 
 class BaseTransformer(ABC):
@@ -10,7 +10,7 @@ class BaseTransformer(ABC):
     def __init__(self, config: dict = None):
         """
         Initialize transformer with configuration.
-        
+
         Args:
             config: Configuration dictionary for the transformer
         """
@@ -20,11 +20,27 @@ class BaseTransformer(ABC):
     def transform(self, ir: IntermediateRepresentation) -> IntermediateRepresentation:
         """
         Transform the intermediate representation.
-        
+
         Args:
             ir: IntermediateRepresentation to transform
-            
+
         Returns:
             Transformed IntermediateRepresentation
         """
         pass
+
+    def transform_sample(self, sample: DataSample) -> DataSample:
+        """
+        Transform a single sample.
+
+        Optional per-sample API. Transformers that override this can be fused
+        by the converter into a single pass over the samples, instead of each
+        transformer in a chain allocating its own intermediate IR.
+
+        Args:
+            sample: DataSample to transform
+
+        Returns:
+            Transformed DataSample (may be a new instance)
+        """
+        raise NotImplementedError
@@ -3,6 +3,7 @@
 from data_formatter.utils.config import DataConfig, ConversionConfig, load_data_config
 from data_formatter.utils.detector import detect_format, detect_styling
 from data_formatter.utils.naming import get_output_path
+from data_formatter.utils.parallel import parmap
 
 __all__ = [
     "DataConfig",
@@ -11,4 +12,5 @@ __all__ = [
     "detect_format",
     "detect_styling",
     "get_output_path",
+    "parmap",
 ]
@@ -1,12 +1,26 @@
 """Configuration handling for data formatter."""
 
 import json
+import sys
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Literal
 
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
-@dataclass
+# slots= landed in dataclasses with 3.10; configs can hold thousands of
+# entries, so skip the per-instance __dict__ where the runtime allows
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+# Configs above this size are streamed entry by entry (when ijson is
+# installed) instead of materializing the whole JSON document first
+_STREAM_THRESHOLD = 10 << 20  # 10 MiB
+
+
+@dataclass(**_SLOTS)
 class DataEntry:
     """Single data entry in data config."""
     data_path: str
@@ -15,7 +29,7 @@ class DataEntry:
     name: Optional[str] = None  # Human-readable name
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class DataConfig:
     """
     Data configuration following the schema:
@@ -64,11 +78,13 @@ class ConversionConfig:
         target_format: Target file format (default: jsonl)
         output_mode: "new_file" or "inplace" (default: new_file)
         transformations: List of transformations to apply
+        compression: Compress output inline ("gzip" or "zstd")
     """
     target_styling: str
     target_format: str = "jsonl"
     output_mode: Literal["new_file", "inplace"] = "new_file"
     transformations: List[Dict[str, Any]] = field(default_factory=list)
+    compression: Optional[Literal["gzip", "zstd"]] = None
 
 
 def load_data_config(config_path: str) -> DataConfig:
@@ -84,8 +100,39 @@ def load_data_config(config_path: str) -> DataConfig:
     path = Path(config_path)
     if not path.exists():
         raise FileNotFoundError(f"Config file not found: {config_path}")
-    
+
+    # Large configs: stream entries straight into DataEntry objects so peak
+    # memory is one entry at a time rather than dict tree + dataclasses
+    if ijson is not None and path.stat().st_size > _STREAM_THRESHOLD:
+        return _stream_data_config(path)
+
     with open(path, 'r', encoding='utf-8') as f:
         config_dict = json.load(f)
-    
+
     return DataConfig.from_dict(config_dict)
+
+
+def _stream_data_config(path: Path) -> DataConfig:
+    """Build a DataConfig by streaming "data" entries with ijson."""
+    entries = []
+    with open(path, 'rb') as f:
+        for item in ijson.items(f, "data.item"):
+            if not isinstance(item, dict):
+                raise ValueError("Each data entry must be a dictionary")
+            if "data_path" not in item:
+                raise ValueError("Each data entry must have 'data_path' field")
+
+            entries.append(DataEntry(
+                data_path=item["data_path"],
+                format=item.get("format"),
+                styling=item.get("styling"),
+                name=item.get("name")
+            ))
+
+    if not entries:
+        # ijson yields nothing for both a missing "data" field and an empty
+        # list; re-read eagerly so schema errors match from_dict exactly
+        with open(path, 'r', encoding='utf-8') as f:
+            return DataConfig.from_dict(json.load(f))
+
+    return DataConfig(data=entries)
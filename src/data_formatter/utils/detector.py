@@ -1,100 +1,230 @@
 """Auto-detection utilities for format and styling."""
 
 import json
+import os
+import re
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import FrozenSet, Optional, Tuple
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
+# Validation-only parse for sniffing: the C decoder when available.
+# orjson.JSONDecodeError subclasses ValueError, so callers catch that.
+_loads = orjson.loads if orjson is not None else json.loads
+
+# Known extensions resolve with one dict probe and no file I/O
+_EXT_MAP = {
+    ".csv": "csv",
+    ".json": "json",
+    ".jsonl": "jsonl",
+    ".yaml": "yaml",
+    ".yml": "yaml",
+}
+
+# Content sniffing inspects at most this many leading bytes
+_SNIFF_BYTES = 4096
+
+# Full Alpaca schema; _styling_matches only treats exact subsets as
+# already-converted, since alpaca's from_ir strips any extra keys
+_ALPACA_KEYS = frozenset(("instruction", "input", "output"))
+
+# Both ChatML delimiters, in order, found in one linear scan instead of
+# two full-string substring searches
+_CHATML_RE = re.compile(r"<\|im_start\|>[\s\S]*?<\|im_end\|>")
+
+
+@lru_cache(maxsize=32)
 def detect_format(file_path: Path) -> Optional[str]:
     """
     Auto-detect file format from extension or content.
-    
+
+    Results are memoized per path for the life of the process, so configs
+    referencing the same file repeatedly only sniff it once.
+
     Args:
         file_path: Path to the file
-        
+
     Returns:
         Detected format ("csv", "json", "jsonl", "yaml") or None
     """
-    # Try extension first
-    ext = file_path.suffix.lower()
-    extension_map = {
-        ".csv": "csv",
-        ".json": "json",
-        ".jsonl": "jsonl",
-        ".yaml": "yaml",
-        ".yml": "yaml",
-    }
-    
-    if ext in extension_map:
-        return extension_map[ext]
-    
-    # Try content-based detection
+    # A recognized extension settles it without touching the file
+    fmt = _EXT_MAP.get(file_path.suffix.lower())
+    if fmt is not None:
+        return fmt
+    return _sniff(file_path)
+
+
+def _sniff(file_path: Path) -> Optional[str]:
+    """
+    Content-based format detection for unrecognized extensions.
+
+    Reads one bounded binary prefix and branches on cheap byte tests in
+    the spirit of file(1); JSON is only actually parsed for the ambiguous
+    scalar-line cases. Never decodes or parses more than the prefix, no
+    matter how large or minified the file is.
+    """
+    # Raw descriptor read: one open, one read of the prefix, one close.
+    # A buffered file object would add its own allocation and readahead
+    # machinery just to hand back the same 4 KiB.
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            first_line = f.readline().strip()
-            
-            # Check for JSONL (each line is valid JSON)
-            try:
-                json.loads(first_line)
-                # Check second line if exists
-                second_line = f.readline().strip()
-                if second_line:
-                    json.loads(second_line)
-                    return "jsonl"
-                return "json"  # Single line JSON
-            except json.JSONDecodeError:
-                pass
-            
-            # Check for YAML (starts with --- or has ': ' pattern)
-            if first_line.startswith("---") or ": " in first_line:
-                return "yaml"
-            
-            # Check for CSV (has commas)
-            if "," in first_line:
-                return "csv"
-    except Exception:
+        fd = os.open(file_path, os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        head = os.read(fd, _SNIFF_BYTES)
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+
+    stripped = head.lstrip()
+    if not stripped:
+        return None
+
+    # Structural first byte: a JSON document or a JSONL stream. A second
+    # record starting right after a newline marks JSONL; pretty-printed
+    # documents indent continuation lines, so they do not trigger it.
+    if stripped[:1] in (b"{", b"["):
+        if b"\n{" in stripped or b"\n[" in stripped:
+            return "jsonl"
+        return "json"
+
+    first_line, _, rest = stripped.partition(b"\n")
+    first_line = first_line.strip()
+
+    # Scalar JSON lines (numbers, quoted strings) still parse; a second
+    # parsable line makes it JSONL
+    try:
+        _loads(first_line)
+        second_line = rest.split(b"\n", 1)[0].strip()
+        if second_line:
+            _loads(second_line)
+            return "jsonl"
+        return "json"
+    except ValueError:
         pass
-    
+
+    # Check for YAML (starts with --- or has ': ' pattern)
+    if stripped.startswith(b"---") or b": " in first_line:
+        return "yaml"
+
+    # Check for CSV (has commas)
+    if b"," in first_line:
+        return "csv"
+
     return None
 
 
+@lru_cache(maxsize=64)
+def _styling_candidates(keys: FrozenSet[str]) -> Tuple[str, ...]:
+    """
+    Styling candidates for a top-level key set, in detection priority order.
+
+    Memoized on the key fingerprint: samples with the same schema (the usual
+    case across a dataset or a multi-file config) resolve their candidate
+    list with one cache hit instead of re-walking the marker checks.
+    """
+    candidates = []
+    if "messages" in keys:
+        candidates.append("openai_chat")
+    if "conversations" in keys:
+        candidates.append("sharegpt")
+    if "instruction" in keys or ("output" in keys and "input" in keys):
+        candidates.append("alpaca")
+    if "text" in keys:
+        candidates.append("chatml")
+        if "label" in keys:
+            candidates.append("text_label")
+    return tuple(candidates)
+
+
+def _is_openai_chat(data: dict, _isinstance=isinstance) -> bool:
+    """Validate the messages payload of an openai_chat candidate."""
+    messages = data["messages"]
+    return _isinstance(messages, list) and bool(messages) and all(
+        _isinstance(m, dict) and "role" in m and "content" in m for m in messages
+    )
+
+
+def _is_sharegpt(data: dict, _isinstance=isinstance) -> bool:
+    """Validate the conversations payload of a sharegpt candidate."""
+    convs = data["conversations"]
+    return _isinstance(convs, list) and bool(convs) and all(
+        _isinstance(c, dict) and "from" in c and "value" in c for c in convs
+    )
+
+
+def _is_chatml(data: dict) -> bool:
+    """Validate the text payload of a chatml candidate."""
+    text = data["text"]
+    return isinstance(text, str) and _CHATML_RE.search(text) is not None
+
+
+# Candidate -> payload validator; candidates without an entry match on
+# their marker keys alone (alpaca, text_label)
+_STYLING_VALIDATORS = {
+    "openai_chat": _is_openai_chat,
+    "sharegpt": _is_sharegpt,
+    "chatml": _is_chatml,
+}
+
+
 def detect_styling(data: dict) -> Optional[str]:
     """
     Auto-detect data styling from structure.
-    
+
+    Candidates come from the memoized key-set lookup; each is confirmed
+    through the validator table, stopping at the first match.
+
     Args:
         data: A data sample (dict)
-        
+
     Returns:
         Detected styling or None
     """
     if not isinstance(data, dict):
         return None
-    
-    # Check for OpenAI chat format
-    if "messages" in data and isinstance(data.get("messages"), list):
-        messages = data["messages"]
-        if messages and all(isinstance(m, dict) and "role" in m and "content" in m for m in messages):
-            return "openai_chat"
-    
-    # Check for ShareGPT format
-    if "conversations" in data and isinstance(data.get("conversations"), list):
-        convs = data["conversations"]
-        if convs and all(isinstance(c, dict) and "from" in c and "value" in c for c in convs):
-            return "sharegpt"
-    
-    # Check for Alpaca format
-    if "instruction" in data or ("output" in data and "input" in data):
-        return "alpaca"
-    
-    # Check for ChatML format
-    if "text" in data and isinstance(data.get("text"), str):
-        text = data["text"]
-        if "<|im_start|>" in text and "<|im_end|>" in text:
-            return "chatml"
-    
-    # Check for simple text/label
-    if "text" in data and "label" in data:
-        return "text_label"
-    
+
+    validators = _STYLING_VALIDATORS
+    for candidate in _styling_candidates(frozenset(data.keys())):
+        validator = validators.get(candidate)
+        if validator is None or validator(data):
+            return candidate
+
     return None
+
+
+def _styling_matches(data: dict, styling: str) -> bool:
+    """
+    Check whether a sample already has the shape of the given styling.
+
+    Cheaper than full detection: only the marker keys are inspected. Used to
+    skip a full re-conversion pass when the data is already in target shape
+    (common for files previously emitted by this tool).
+
+    Args:
+        data: A data sample (dict)
+        styling: Styling name to test against
+
+    Returns:
+        True if the sample's top-level keys match the styling's schema
+    """
+    if styling == "openai_chat":
+        return "messages" in data
+    if styling == "sharegpt":
+        return "conversations" in data
+    if styling == "alpaca":
+        # Marker keys alone are not enough here: samples carrying extra
+        # keys must still go through from_ir, which strips them
+        return (("instruction" in data or "output" in data)
+                and data.keys() <= _ALPACA_KEYS)
+    if styling == "chatml":
+        text = data.get("text")
+        return isinstance(text, str) and "<|im_start|>" in text
+    if styling == "text_label":
+        return "text" in data and "label" in data
+    return False
@@ -1,42 +1,51 @@
 """Output file naming utilities."""
 
 from pathlib import Path
-from typing import Literal
+from typing import Literal, Optional
+
+# Known format -> extension; unknown formats fall back to "." + format
+_FORMAT_TO_EXT = {
+    "json": ".json",
+    "jsonl": ".jsonl",
+    "csv": ".csv",
+    "yaml": ".yaml",
+}
+
+# Suffix appended when the writer compresses inline
+_COMPRESSION_EXT = {
+    "gzip": ".gz",
+    "zstd": ".zst",
+}
 
 
 def get_output_path(
     input_path: Path,
     target_styling: str,
     target_format: str = "jsonl",
-    output_mode: Literal["new_file", "inplace"] = "new_file"
+    output_mode: Literal["new_file", "inplace"] = "new_file",
+    compression: Optional[str] = None
 ) -> Path:
     """
     Generate output file path based on configuration.
-    
+
     Args:
         input_path: Original input file path
         target_styling: Target styling name
         target_format: Target file format
         output_mode: "new_file" or "inplace"
-        
+        compression: Writer compression ("gzip" or "zstd"), appends the
+            matching suffix so downstream tools recognize the encoding
+
     Returns:
         Path object for output file
     """
     if output_mode == "inplace":
         return input_path
-    
-    # new_file mode: create filename with pattern {original_name}_{target_styling}.{extension}
-    stem = input_path.stem
-    new_stem = f"{stem}_{target_styling}"
-    
-    # Determine extension from format
-    format_to_ext = {
-        "json": ".json",
-        "jsonl": ".jsonl",
-        "csv": ".csv",
-        "yaml": ".yaml",
-    }
-    
-    extension = format_to_ext.get(target_format, f".{target_format}")
-    
-    return input_path.parent / f"{new_stem}{extension}"
+
+    # new_file mode: filename pattern {original_name}_{target_styling}.{extension}
+    extension = _FORMAT_TO_EXT.get(target_format) or "." + target_format
+    if compression is not None:
+        extension += _COMPRESSION_EXT.get(compression, "")
+
+    # Single with_name call; no parent/join intermediate
+    return input_path.with_name(input_path.stem + "_" + target_styling + extension)
@@ -0,0 +1,50 @@
+"""Chunked thread-pool mapping helper."""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def _map_chunk(fn: Callable[[T], R], chunk: Sequence[T]) -> List[R]:
+    """Apply fn to one chunk; runs inside a worker thread."""
+    return [fn(item) for item in chunk]
+
+
+def parmap(
+    fn: Callable[[T], R],
+    items: Sequence[T],
+    chunksize: int = 1024,
+    max_workers: Optional[int] = None,
+) -> List[R]:
+    """
+    Map fn over items with a thread pool, preserving order.
+
+    Items are handed to workers in chunks so per-task overhead is paid
+    once per chunk, not once per item. Threads only help when fn releases
+    the GIL (file/socket I/O, C extensions such as orjson or pandas);
+    pure-Python per-sample conversion stays on the per-entry process pool
+    in DataFormatter.convert, which sidesteps the GIL entirely.
+
+    Args:
+        fn: Callable applied to each item
+        items: Input sequence
+        chunksize: Number of items per worker task
+        max_workers: Thread count (default: os.cpu_count())
+
+    Returns:
+        Results in the same order as items
+    """
+    if len(items) <= chunksize:
+        return [fn(item) for item in items]
+
+    chunks = [items[i:i + chunksize] for i in range(0, len(items), chunksize)]
+    max_workers = min(max_workers or os.cpu_count() or 1, len(chunks))
+
+    results: List[R] = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for chunk_result in executor.map(_map_chunk, (fn,) * len(chunks), chunks):
+            results.extend(chunk_result)
+    return results
@@ -1,9 +1,36 @@
-"""Writers package."""
-
-from data_formatter.writers.base import BaseWriter
-from data_formatter.writers.jsonl_writer import JSONLWriter
-from data_formatter.writers.json_writer import JSONWriter
-from data_formatter.writers.csv_writer import CSVWriter
-from data_formatter.writers.yaml_writer import YAMLWriter
-
-__all__ = ["BaseWriter", "JSONLWriter", "JSONWriter", "CSVWriter", "YAMLWriter"]
+"""Writers package."""
+
+from data_formatter.registry import writer_registry
+from data_formatter.writers.base import BaseWriter
+from data_formatter.writers.jsonl_writer import JSONLWriter
+from data_formatter.writers.json_writer import JSONWriter
+from data_formatter.writers.csv_writer import CSVWriter
+from data_formatter.writers.yaml_writer import YAMLWriter
+
+# Writers are stateless; the built-ins get one shared instance each so
+# dispatch is a single dict probe with no registry indirection
+_INSTANCES = {
+    "jsonl": JSONLWriter(),
+    "json": JSONWriter(),
+    "csv": CSVWriter(),
+    "yaml": YAMLWriter(),
+}
+
+
+def get_writer(fmt: str):
+    """
+    Return the shared writer instance for fmt, or None if unknown.
+
+    Built-in formats hit the precomputed instance table; formats
+    registered by plugins are instantiated once on first use.
+    """
+    writer = _INSTANCES.get(fmt)
+    if writer is None:
+        writer_class = writer_registry.get(fmt)
+        if writer_class is None:
+            return None
+        writer = _INSTANCES[fmt] = writer_class()
+    return writer
+
+
+__all__ = ["BaseWriter", "JSONLWriter", "JSONWriter", "CSVWriter", "YAMLWriter", "get_writer"]
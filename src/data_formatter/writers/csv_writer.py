@@ -1,10 +1,51 @@
 """CSV format writer."""
 
 import csv
+import json
 from pathlib import Path
 from data_formatter.ir import IntermediateRepresentation
 from data_formatter.writers.base import BaseWriter
 from data_formatter.registry import writer_registry
+from data_formatter.writers.base import _ORJSON_OPTS
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    def _json_cell(value, _dumps=orjson.dumps, _opts=_ORJSON_OPTS):
+        """Encode a container cell with orjson (handles numpy/datetime)."""
+        return _dumps(value, option=_opts).decode("utf-8")
+else:
+    def _json_cell(value, _dumps=json.dumps):
+        """Encode a container cell with the stdlib encoder."""
+        return _dumps(value, ensure_ascii=False)
+
+
+def _make_row_formatter(fieldnames):
+    """
+    Build a row formatter specialized to one write's column order.
+
+    The returned closure hard-binds the field tuple, the JSON cell
+    encoder, str and isinstance as defaults, so the per-row loop runs on
+    locals only and the old per-cell helper call disappears.
+    """
+    def format_row(data, _fields=tuple(fieldnames), _json=_json_cell,
+                   _str=str, _isinstance=isinstance, _containers=(list, dict)):
+        row = []
+        append = row.append
+        get = data.get
+        for key in _fields:
+            value = get(key)
+            if value is None:
+                append('')
+            elif _isinstance(value, _containers):
+                append(_json(value))
+            else:
+                append(_str(value))
+        return row
+    return format_row
 
 
 @writer_registry.register("csv")
@@ -22,29 +63,27 @@ class CSVWriter(BaseWriter):
         
         if not ir.samples:
             # Create empty file
-            open(output_path, 'w').close()
+            self._open(output_path, 'w').close()
             return
         
-        # Collect all unique keys across all samples
-        all_keys = set()
-        for sample in ir.samples:
-            all_keys.update(sample.data.keys())
-        
-        fieldnames = sorted(all_keys)  # Consistent ordering
-        
-        with open(output_path, 'w', encoding='utf-8', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            
-            for sample in ir.samples:
-                # Flatten nested structures
-                row = {}
-                for key in fieldnames:
-                    value = sample.data.get(key, '')
-                    # Convert non-string values to strings
-                    if isinstance(value, (list, dict)):
-                        import json
-                        row[key] = json.dumps(value, ensure_ascii=False)
-                    else:
-                        row[key] = str(value) if value is not None else ''
-                writer.writerow(row)
+        # Cheap first pass for the key union; rows need the final column
+        # order before they can be laid out positionally. A plain dict is
+        # the union accumulator: dict.update merges whole key tables at
+        # C level, with no separate set to build and discard
+        samples = ir.samples
+        seen = {}
+        update_keys = seen.update
+        for sample in samples:
+            update_keys(sample.data)
+
+        fieldnames = sorted(seen)  # Consistent ordering
+
+        # Positional csv.writer skips DictWriter's per-row fieldname
+        # remapping; rows come from a formatter specialized to this
+        # write's column order, one list per sample, built lazily
+        format_row = _make_row_formatter(fieldnames)
+        with self._open(output_path, 'w', encoding='utf-8', newline='', buffering=self.buffer_size) as f:
+            writer = csv.writer(f)
+            writer.writerow(fieldnames)
+            writer.writerows(map(format_row, (sample.data for sample in samples)))
+            self._sync(f)
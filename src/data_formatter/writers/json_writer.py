@@ -3,23 +3,86 @@
 import json
 from pathlib import Path
 from data_formatter.ir import IntermediateRepresentation
-from data_formatter.writers.base import BaseWriter
+from data_formatter.writers.base import BaseWriter, _drain_samples, _ORJSON_OPTS
 from data_formatter.registry import writer_registry
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 @writer_registry.register("json")
 class JSONWriter(BaseWriter):
     """Writer for JSON files (array format)."""
 
-    def write(self, ir: IntermediateRepresentation, output_path: Path) -> None:
+    def write(
+        self,
+        ir: IntermediateRepresentation,
+        output_path: Path,
+        drain: bool = False,
+    ) -> None:
         """
         Write IR to JSON file as an array of objects.
-        
+
         Format: [{"a": 1}, {"b": 2}, ...]
+
+        With orjson available, records are encoded one at a time and
+        streamed to a buffered binary file: no intermediate list of all
+        sample dicts and no pure-Python encoder, while the indent-2
+        layout stays byte-identical to the stdlib output.
+
+        Args:
+            ir: IntermediateRepresentation to write
+            output_path: Path where the file should be written
+            drain: Destructively consume ir.samples while writing, so each
+                sample is released as soon as it is encoded. Caps peak RSS
+                for write-once pipelines; the IR is empty afterwards.
         """
         output_path.parent.mkdir(parents=True, exist_ok=True)
-        
+
+        if not ir.samples:
+            with self._open(output_path, 'w', encoding='utf-8') as f:
+                f.write("[]")
+                self._sync(f)
+            return
+
+        source = _drain_samples(ir.samples) if drain else ir.samples
+
+        if orjson is not None:
+            dumps = orjson.dumps
+            option = _ORJSON_OPTS | orjson.OPT_INDENT_2
+            with self._open(output_path, 'wb', buffering=self.buffer_size) as f:
+                write = f.write
+                write(b"[\n")
+                sep = b""
+                for sample in source:
+                    write(sep)
+                    # Shift the record two spaces right so array elements
+                    # nest exactly like json.dump(..., indent=2)
+                    write(b"  " + dumps(sample.data, option=option).replace(b"\n", b"\n  "))
+                    sep = b",\n"
+                write(b"\n]")
+                self._sync(f)
+            return
+
+        if drain:
+            # Stdlib drain path: same record-at-a-time layout in text mode
+            dumps = json.dumps
+            with self._open(output_path, 'w', encoding='utf-8', buffering=self.buffer_size) as f:
+                write = f.write
+                write("[\n")
+                sep = ""
+                for sample in source:
+                    write(sep)
+                    write("  " + dumps(sample.data, indent=2, ensure_ascii=False).replace("\n", "\n  "))
+                    sep = ",\n"
+                write("\n]")
+                self._sync(f)
+            return
+
         data = [sample.data for sample in ir.samples]
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
+
+        with self._open(output_path, 'w', encoding='utf-8', buffering=self.buffer_size) as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
+            self._sync(f)
@@ -1,11 +1,24 @@
 """YAML format writer."""
 
+import re
+
 import yaml
 from pathlib import Path
 from data_formatter.ir import IntermediateRepresentation
 from data_formatter.writers.base import BaseWriter
 from data_formatter.registry import writer_registry
 
+try:
+    # LibYAML-backed emitter, an order of magnitude faster than the pure
+    # Python one; available when PyYAML was built against libyaml
+    from yaml import CSafeDumper as _SafeDumper
+except ImportError:
+    from yaml import SafeDumper as _SafeDumper
+
+# Newlines that precede content; blank lines (e.g. inside folded scalars)
+# must not pick up sequence indentation
+_LINE_START = re.compile(r"\n(?=.)")
+
 
 @writer_registry.register("yaml")
 class YAMLWriter(BaseWriter):
@@ -15,11 +28,30 @@ class YAMLWriter(BaseWriter):
         """
         Write IR to YAML file as an array of objects.
         
-        Uses safe_dump for security.
+        Uses the safe dumper for security - the libyaml C variant when
+        PyYAML was built with it.
+
+        Samples are emitted one at a time and re-indented into the
+        top-level sequence, so peak memory stays at one serialized sample
+        instead of the whole IR twice over. The file layout matches a
+        single safe_dump of the full list.
         """
         output_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        data = [sample.data for sample in ir.samples]
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            yaml.safe_dump(data, f, allow_unicode=True, sort_keys=False)
+
+        if not ir.samples:
+            with self._open(output_path, 'w', encoding='utf-8') as f:
+                f.write("[]\n")
+                self._sync(f)
+            return
+
+        dump = yaml.dump
+        indent = _LINE_START.sub
+        with self._open(output_path, 'w', encoding='utf-8', buffering=self.buffer_size) as f:
+            write = f.write
+            for sample in ir.samples:
+                block = dump(sample.data, Dumper=_SafeDumper,
+                             allow_unicode=True, sort_keys=False)
+                # Turn the standalone document into one sequence item:
+                # "- " on the first line, two spaces on the rest
+                write("- " + indent("\n  ", block[:-1]) + "\n")
+            self._sync(f)